@@ -1,8 +1,50 @@
 from N2G import drawio_diagram
+from node_rules import NodeClassifier
+from natural_order import natural_key
+from topology_data import load_topology_data
 import yaml
 from collections import defaultdict
 import argparse
+import bisect
+import functools
+import heapq
+import io
+import json
+import math
 import os
+import random
+import time
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+
+# Directory of this script, where the built-in themes are located
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Options of build_diagram that clab_to_drawio accepts
+DIAGRAM_OPTIONS = ('include_unlinked_nodes', 'no_links', 'layout', 'seed', 'iterations', 'time_budget', 'convergence_threshold', 'hub_layout', 'hub_threshold', 'saved_layout', 'groups', 'routing')
+
+# Accepted values of the options of build_diagram that take one of a fixed set, shared by the command line and clab_to_drawio
+OPTION_CHOICES = {
+    'layout': ('vertical', 'horizontal', 'force'),
+    'hub_layout': ('bus', 'stub', 'none'),
+    'groups': ('none', 'expanded', 'collapsed'),
+    'routing': ('none', 'orthogonal'),
+}
+
+# Version of the layout files written by --save-layout
+LAYOUT_FORMAT_VERSION = 1
+
+# Node kinds that are always laid out as hubs
+HUB_KINDS = ('bridge', 'ovs-bridge')
+
+# Fallback style for hubs drawn as bus bars, used when the theme does not define 'bus_style'
+DEFAULT_BUS_STYLE = "rounded=0;whiteSpace=wrap;html=1;fillColor=#4D5766;strokeColor=none;labelPosition=left;verticalLabelPosition=middle;align=right;verticalAlign=middle;spacingRight=5;"
+
+# Fallback style for the containers of node groups, used when the theme does not define 'group_style'
+DEFAULT_GROUP_STYLE = "swimlane;whiteSpace=wrap;html=1;rounded=1;startSize=30;fillColor=none;strokeColor=#B3B3B3;fontColor=#666666;container=1;collapsible=1;"
+
+# Space between a group container and its nodes, and the height of the container title bar (its startSize)
+GROUP_PADDING, GROUP_HEADER = 40, 30
 
 def assign_graphlevels(nodes, links, verbose=False):
     """
@@ -27,14 +69,22 @@ def assign_graphlevels(nodes, links, verbose=False):
         connections[source]['downstream'].add(target)
         connections[target]['upstream'].add(source)
 
-    # Helper function to assign graphlevel by recursively checking connections
-    def set_graphlevel(node, current_graphlevel, verbose=False):
-        if node_graphlevels[node] != -1 and node_graphlevels[node] < current_graphlevel:
-            # Skip setting graphlevel if it is manually set and higher than the current graphlevel
-            return
-        node_graphlevels[node] = max(node_graphlevels[node], current_graphlevel)
-        for downstream_node in connections[node]['downstream']:
-            set_graphlevel(downstream_node, current_graphlevel + 1)
+    # Helper function to assign graphlevels with a depth-first walk along the downstream connections.
+    # A node takes the graphlevel of the walk that reaches it first and is expanded only once, so links back to
+    # a node that is already placed (cycles, meshes) are ignored and every link is followed at most once.
+    # The walk uses an explicit stack, so long chains do not run into the recursion limit.
+    expanded = set()
+    def set_graphlevel(start_node, start_graphlevel, verbose=False):
+        stack = [(start_node, start_graphlevel)]
+        while stack:
+            node, current_graphlevel = stack.pop()
+            if node in expanded or (node_graphlevels[node] != -1 and node_graphlevels[node] < current_graphlevel):
+                # Skip nodes already expanded, or placed (or manually set) above the current graphlevel
+                continue
+            node_graphlevels[node] = max(node_graphlevels[node], current_graphlevel)
+            expanded.add(node)
+            # Pushed in reverse, so the downstream nodes are walked in sorted order
+            stack.extend((downstream_node, current_graphlevel + 1) for downstream_node in sorted(connections[node]['downstream'], key=natural_key, reverse=True))
 
     # Start by setting the graphlevel of nodes with no upstream connections or with a manually set graphlevel
     for node in nodes:
@@ -54,13 +104,13 @@ def assign_graphlevels(nodes, links, verbose=False):
         prefix_map[prefix].append(node)
 
     # Attempt to assign graphlevels based on these groupings
-    graphlevel_counter = max(node_graphlevels.values()) + 1
+    graphlevel_counter = max(node_graphlevels.values(), default=-1) + 1
     for prefix, nodes in prefix_map.items():
         for node in nodes:
             node_graphlevels[node] = graphlevel_counter
         graphlevel_counter += 1
 
-    sorted_nodes = sorted(node_graphlevels, key=lambda n: (node_graphlevels[n], n))
+    sorted_nodes = sorted(node_graphlevels, key=lambda n: (node_graphlevels[n], natural_key(n)))
     return sorted_nodes, node_graphlevels, connections
 
 def center_align_nodes(nodes_by_graphlevel, positions, layout='vertical', verbose=False):
@@ -178,7 +228,7 @@ def adjust_intermediary_nodes(nodes_by_graphlevel, connections, positions, layou
     all_intermediary_nodes = set()
     for node, links in connections.items():
         node_level = node_to_graphlevel[node]
-        for upstream in links['upstream']:
+        for upstream in sorted(links['upstream'], key=natural_key):
             upstream_level = node_to_graphlevel[upstream]
 
             # Check if the level is non-adjacent
@@ -191,8 +241,8 @@ def adjust_intermediary_nodes(nodes_by_graphlevel, connections, positions, layou
                 if has_adjacent_connection:
                     if verbose:
                         print(f"Adjacent connection to intermediary level: {upstream} -> {node} -> {intermediary_level}")
-                    intermediary_nodes_at_level = [n for n in connections[upstream]['downstream'] if node_to_graphlevel[n] == intermediary_level] + \
-                                                   [n for n in connections[node]['upstream'] if node_to_graphlevel[n] == intermediary_level]
+                    intermediary_nodes_at_level = [n for n in sorted(connections[upstream]['downstream'], key=natural_key) if node_to_graphlevel[n] == intermediary_level] + \
+                                                   [n for n in sorted(connections[node]['upstream'], key=natural_key) if node_to_graphlevel[n] == intermediary_level]
                     
                     if verbose:
                         print(f"Nodes at intermediary level {intermediary_level}: {', '.join(intermediary_nodes_at_level)}")
@@ -209,7 +259,7 @@ def adjust_intermediary_nodes(nodes_by_graphlevel, connections, positions, layou
                         upstream_positions[intermediary_node] = (upstream, positions[upstream])
 
                 else:
-                    for downstream in links['downstream']:
+                    for downstream in sorted(links['downstream'], key=natural_key):
                         downstream_level = node_to_graphlevel[downstream]
                         if abs(downstream_level - node_level) >= 2:
                             non_adjacent_connections.append((upstream, node, downstream))
@@ -217,7 +267,7 @@ def adjust_intermediary_nodes(nodes_by_graphlevel, connections, positions, layou
 
     # Group intermediary nodes by their levels
     intermediary_nodes_by_level = {}
-    for node in all_intermediary_nodes:
+    for node in sorted(all_intermediary_nodes, key=natural_key):
         level = node_to_graphlevel[node]
         if level not in intermediary_nodes_by_level:
             intermediary_nodes_by_level[level] = []
@@ -235,9 +285,9 @@ def adjust_intermediary_nodes(nodes_by_graphlevel, connections, positions, layou
         # Sort the selected group by their position to find the top and bottom nodes
         # The sorting key changes based on the layout
         if layout == 'horizontal':
-            sorted_group = sorted(selected_group, key=lambda node: positions[node][1])
+            sorted_group = sorted(selected_group, key=lambda node: (positions[node][1], natural_key(node)))
         else:  # 'vertical'
-            sorted_group = sorted(selected_group, key=lambda node: positions[node][0])
+            sorted_group = sorted(selected_group, key=lambda node: (positions[node][0], natural_key(node)))
 
         top_node = sorted_group[0]
         bottom_node = sorted_group[-1]
@@ -328,9 +378,10 @@ def calculate_positions(sorted_nodes, links, node_graphlevels, connections, layo
     def prioritize_placement(nodes, adjacency, node_graphlevels, layout, verbose=False):
         # Calculate connection counts within the same level
         connection_counts_within_level = {}
+        level_nodes = set(nodes)
         for node in nodes:
             level = node_graphlevels[node]
-            connections_within_level = [n for n in adjacency[node] if n in nodes and node_graphlevels[n] == level]
+            connections_within_level = [n for n in adjacency[node] if n in level_nodes and node_graphlevels[n] == level]
             connection_counts_within_level[node] = len(connections_within_level)
         
         # Determine if sorting is needed by checking if any node has more than one connection within the level
@@ -345,10 +396,10 @@ def calculate_positions(sorted_nodes, links, node_graphlevels, connections, layo
         single_connection_nodes = [node for node, count in connection_counts_within_level.items() if count == 1]
         
         # Sort nodes with multiple connections
-        multi_connection_nodes_sorted = sorted(multi_connection_nodes, key=lambda node: (-len(adjacency[node]), node))
+        multi_connection_nodes_sorted = sorted(multi_connection_nodes, key=lambda node: (-len(adjacency[node]), natural_key(node)))
         
         # Sort single connection nodes
-        single_connection_nodes_sorted = sorted(single_connection_nodes, key=lambda node: (len(adjacency[node]), node))
+        single_connection_nodes_sorted = sorted(single_connection_nodes, key=lambda node: (len(adjacency[node]), natural_key(node)))
         
         # Merge single and multi-connection nodes, placing single-connection nodes at the ends
         ordered_nodes = single_connection_nodes_sorted[:len(single_connection_nodes_sorted)//2] + \
@@ -385,7 +436,7 @@ def calculate_positions(sorted_nodes, links, node_graphlevels, connections, layo
 
     for graphlevel, graphlevel_nodes in nodes_by_graphlevel.items():
         # Sort nodes within the graphlevel to ensure missing nodes are placed at the end
-        graphlevel_nodes_sorted = sorted(graphlevel_nodes, key=lambda node: (node not in positions, node))
+        graphlevel_nodes_sorted = sorted(graphlevel_nodes, key=lambda node: (node not in positions, natural_key(node)))
 
         for i, node in enumerate(graphlevel_nodes_sorted):
             if node in positions:
@@ -404,6 +455,162 @@ def calculate_positions(sorted_nodes, links, node_graphlevels, connections, layo
 
     return positions
 
+class QuadTree:
+    """
+    Region quadtree used by the force-directed layout for the Barnes-Hut approximation.
+    Every cell keeps the number of nodes it contains and their center of mass, so a distant
+    cluster of nodes can be treated as a single body when computing repulsion.
+    """
+
+    __slots__ = ('x', 'y', 'size', 'mass', 'com_x', 'com_y', 'body', 'children')
+
+    def __init__(self, x, y, size):
+        self.x, self.y, self.size = x, y, size
+        self.mass = 0
+        self.com_x = self.com_y = 0.0
+        self.body = None
+        self.children = None
+
+    def child_for(self, bx, by):
+        half = self.size / 2
+        index = (bx >= self.x + half) + 2 * (by >= self.y + half)
+        if self.children[index] is None:
+            self.children[index] = QuadTree(self.x + half * (index & 1), self.y + half * (index >> 1), half)
+        return self.children[index]
+
+    def insert(self, body, bx, by, min_size=1e-3):
+        cell = self
+        while True:
+            total = cell.mass + 1
+            cell.com_x = (cell.com_x * cell.mass + bx) / total
+            cell.com_y = (cell.com_y * cell.mass + by) / total
+            cell.mass = total
+            if cell.children is None:
+                if total == 1:
+                    cell.body = (body, bx, by)
+                    return
+                if cell.size <= min_size:
+                    # Coincident nodes: keep the aggregated mass in this leaf
+                    return
+                # Split the leaf and push the existing body one level down
+                existing, cell.body = cell.body, None
+                cell.children = [None, None, None, None]
+                child = cell.child_for(existing[1], existing[2])
+                child.mass, child.com_x, child.com_y, child.body = 1, existing[1], existing[2], existing
+            cell = cell.child_for(bx, by)
+
+    def repulsion(self, body, px, py, k_squared, theta):
+        """
+        Returns the approximated repulsive force (k^2 / d per node) acting on a body at (px, py).
+        Cells that look small enough from the body (size / distance < theta) are not opened.
+        """
+        fx = fy = 0.0
+        theta_squared = theta * theta
+        stack = [self]
+        while stack:
+            cell = stack.pop()
+            dx, dy = px - cell.com_x, py - cell.com_y
+            dist_squared = dx * dx + dy * dy
+            if cell.children is None:
+                if cell.body[0] == body:
+                    continue
+            elif cell.size * cell.size >= theta_squared * dist_squared:
+                stack.extend(child for child in cell.children if child is not None)
+                continue
+            dist_squared = max(dist_squared, 0.01)
+            force = k_squared * cell.mass / dist_squared
+            fx += dx * force
+            fy += dy * force
+        return fx, fy
+
+def force_directed_layout(nodes, links, seed_positions=None, seed=0, iterations=300, time_budget=None, tolerance=0.5, theta=0.8, ideal_length=200, verbose=False):
+    """
+    Computes node positions with a Fruchterman-Reingold style force simulation, suitable for rings,
+    meshes and other topologies without a natural hierarchy.
+    Repulsion is approximated with a Barnes-Hut quadtree, giving O(n log n) work per iteration.
+    The simulation starts from seed_positions when given (e.g. the hierarchical layout), otherwise
+    from pseudo-random positions drawn from the given seed, so identical inputs give identical output.
+    It stops after the iteration budget, the optional time budget (seconds), or once no node moves
+    more than tolerance pixels in an iteration.
+    Returns a dictionary mapping each node to its calculated position.
+    """
+
+    names = list(nodes)
+    count = len(names)
+    if count == 0:
+        return {}
+    rng = random.Random(seed)
+    index = {name: i for i, name in enumerate(names)}
+    side = ideal_length * math.sqrt(count)
+
+    if seed_positions:
+        xs = [seed_positions[name][0] + rng.uniform(-1, 1) for name in names]
+        ys = [seed_positions[name][1] + rng.uniform(-1, 1) for name in names]
+    else:
+        xs = [rng.uniform(0, side) for _ in names]
+        ys = [rng.uniform(0, side) for _ in names]
+
+    # Multiple links between the same pair of nodes only pull once
+    edges = sorted({tuple(sorted((index[link['source']], index[link['target']]))) for link in links
+                    if link['source'] in index and link['target'] in index and link['source'] != link['target']})
+
+    k_squared = ideal_length * ideal_length
+    gravity = 0.02
+    temperature = side / 10
+    cooling = 0.95
+    deadline = time.monotonic() + time_budget if time_budget else None
+
+    max_move = 0.0
+    for iteration in range(1, iterations + 1):
+        min_x, min_y = min(xs), min(ys)
+        tree = QuadTree(min_x, min_y, max(max(xs) - min_x, max(ys) - min_y, 1.0) + 1.0)
+        for i in range(count):
+            tree.insert(i, xs[i], ys[i])
+
+        center_x, center_y = tree.com_x, tree.com_y
+        disp_x, disp_y = [0.0] * count, [0.0] * count
+        for i in range(count):
+            fx, fy = tree.repulsion(i, xs[i], ys[i], k_squared, theta)
+            disp_x[i] = fx - gravity * (xs[i] - center_x)
+            disp_y[i] = fy - gravity * (ys[i] - center_y)
+
+        for i, j in edges:
+            dx, dy = xs[i] - xs[j], ys[i] - ys[j]
+            dist = math.sqrt(dx * dx + dy * dy)
+            fx, fy = dx * dist / ideal_length, dy * dist / ideal_length
+            disp_x[i] -= fx
+            disp_y[i] -= fy
+            disp_x[j] += fx
+            disp_y[j] += fy
+
+        # Move every node along its displacement, limited by the current temperature
+        max_move = 0.0
+        for i in range(count):
+            length = math.sqrt(disp_x[i] * disp_x[i] + disp_y[i] * disp_y[i])
+            if length > 0:
+                move = min(length, temperature)
+                xs[i] += disp_x[i] / length * move
+                ys[i] += disp_y[i] / length * move
+                max_move = max(max_move, move)
+
+        temperature *= cooling
+        if max_move < tolerance:
+            if verbose:
+                print(f"Force layout converged after {iteration} iterations")
+            break
+        if deadline is not None and time.monotonic() > deadline:
+            if verbose:
+                print(f"Force layout stopped by time budget after {iteration} iterations")
+            break
+    else:
+        if verbose:
+            print(f"Force layout reached the iteration budget ({iterations}), last max move {max_move:.2f}")
+
+    # Shift the drawing so it starts at the same origin as the hierarchical layouts
+    x_start, y_start = 100, 100
+    min_x, min_y = min(xs), min(ys)
+    return {name: (round(xs[i] - min_x + x_start), round(ys[i] - min_y + y_start)) for i, name in enumerate(names)}
+
 def create_links(base_style, positions, source, target, source_graphlevel, target_graphlevel, adjacency, layout='vertical', link_index=0, total_links=1, verbose=False):
     """
     Constructs a link style string for a graph visualization, considering the positions and graph levels of source and target nodes.
@@ -419,7 +626,7 @@ def create_links(base_style, positions, source, target, source_graphlevel, targe
     above_to_below = source_y < target_y
     
     # Calculate step for multiple links
-    step = 0.5 if total_links == 1 else 0.25 + 0.5 * (link_index / (total_links - 1))
+    step = 0.5 if total_links == 1 else format_number(0.25 + 0.5 * (link_index / (total_links - 1)), 4)
     
     if layout == 'horizontal':
         # Different graph levels
@@ -446,12 +653,206 @@ def create_links(base_style, positions, source, target, source_graphlevel, targe
             else:
                 entryX, exitX = (1, 0)
             entryY = exitY = step
+
+    elif layout == 'force':
+        # Free placement: connect the sides of the nodes that face each other
+        if abs(target_x - source_x) >= abs(target_y - source_y):
+            entryX, exitX = (0, 1) if left_to_right else (1, 0)
+            entryY = exitY = step
+        else:
+            entryY, exitY = (0, 1) if above_to_below else (1, 0)
+            entryX = exitX = step
             
     links  = f"{base_style}entryY={entryY};exitY={exitY};entryX={entryX};exitX={exitX};"
     return links
 
 
-def add_nodes_and_links(diagram, nodes, positions, links, node_graphlevels, no_links=False, layout='vertical', verbose=False, base_style=None, link_style=None, custom_styles=None, icon_to_group_mapping=None, src_label_style=None, trgt_label_style=None):
+def format_number(value, digits=2):
+    """
+    Rounds a coordinate or anchor fraction to a fixed number of digits, returning an int for whole numbers,
+    so the generated XML does not depend on floating point noise.
+    """
+    value = round(value, digits)
+    return int(value) if value == int(value) else value
+
+def canonical_link_id(link):
+    """
+    Returns an id for a link that does not depend on the order of its endpoints or on its position in the file.
+    """
+    endpoints = sorted((f"{link['source']}:{link['source_intf']}", f"{link['target']}:{link['target_intf']}"), key=natural_key)
+    return f"{endpoints[0]}:{endpoints[1]}"
+
+def resolve_node_info(node_info, kinds=None, defaults=None):
+    """
+    Returns a copy of a node's definition with its effective kind, image and type, inherited the way containerlab
+    does: from the node itself, then from its kind in topology.kinds, then from topology.defaults.
+    """
+    node_info = dict(node_info or {})
+    defaults = defaults or {}
+    kind = node_info.get('kind') or defaults.get('kind')
+    kind_info = (kinds or {}).get(kind) or {}
+    if kind:
+        node_info['kind'] = kind
+    for attribute in ('image', 'type'):
+        value = node_info.get(attribute) or kind_info.get(attribute) or defaults.get(attribute)
+        if value:
+            node_info[attribute] = value
+    return node_info
+
+def resolve_nodes(containerlab_data):
+    """
+    Returns the nodes of a parsed containerlab topology with their effective kind, image and type, see resolve_node_info.
+    """
+    topology = containerlab_data['topology']
+    kinds, defaults = topology.get('kinds'), topology.get('defaults')
+    return {name: resolve_node_info(info, kinds, defaults) for name, info in (topology.get('nodes') or {}).items()}
+
+def determine_node_group(node_name, node_info, node_classifier):
+    """
+    Determines the style group of a node from the theme's classification rules.
+    node_info should hold the node's effective kind and image, as returned by resolve_node_info.
+    """
+    node_info = node_info or {}
+    group, _ = node_classifier.classify(node_name, kind=node_info.get('kind'), image=node_info.get('image'), labels=node_info.get('labels'))
+    return group
+
+def detect_hubs(nodes, links, degree_threshold=0, verbose=False):
+    """
+    Identifies hub nodes, i.e. nodes connected to nearly everything such as bridges and management switches.
+    A node is a hub if its kind is a bridge ('bridge' or 'ovs-bridge') or, when degree_threshold is set,
+    if it has at least degree_threshold distinct neighbours.
+    Returns the set of hub node names.
+    """
+    neighbours = defaultdict(set)
+    for link in links:
+        neighbours[link['source']].add(link['target'])
+        neighbours[link['target']].add(link['source'])
+
+    hubs = set()
+    for node, node_info in nodes.items():
+        kind = (node_info or {}).get('kind')
+        if kind in HUB_KINDS or (degree_threshold and len(neighbours[node]) >= degree_threshold):
+            hubs.add(node)
+            if verbose:
+                print(f"{node} is a hub (kind: {kind}, neighbours: {len(neighbours[node])})")
+    return hubs
+
+def add_hubs(diagram, hubs, hub_links, positions, hub_layout='bus', no_links=False, layout='vertical', verbose=False, base_style=None, link_style=None, custom_styles=None, node_classifier=None, src_label_style=None, trgt_label_style=None, bus_style=None, hub_nodes=None):
+    """
+    Adds hub nodes and their links to a diagram whose other nodes are already placed.
+    With the 'bus' hub layout every hub is drawn as a bar spanning its neighbours, placed before the first of them
+    along the primary axis, and every link runs straight from the neighbour to the bar.
+    With the 'stub' hub layout the hub is duplicated as a small stub next to every neighbour.
+    Either way the hub takes no room within a graph-level, so the diagram width only depends on the other nodes.
+    Hubs that neither form can draw (no neighbours other than hubs, or no links at all), and with 'stub' hubs linked
+    to other hubs, get one full-size node, lined up before the first graph-level.
+    Returns a dictionary mapping each added bar or stub to its position.
+    """
+    hub_nodes = hub_nodes or {}
+    node_size, stub_size, stub_distance = 75, 40, 120
+
+    # Group links per hub and per neighbour, keeping links between two hubs apart
+    links_by_hub = defaultdict(lambda: defaultdict(list))
+    inter_hub_links = []
+    for link in hub_links:
+        source_is_hub, target_is_hub = link['source'] in hubs, link['target'] in hubs
+        if source_is_hub and target_is_hub:
+            inter_hub_links.append(link)
+        elif source_is_hub:
+            links_by_hub[link['source']][link['target']].append(link)
+        else:
+            links_by_hub[link['target']][link['source']].append(link)
+
+    def add_link(link, source, target, style):
+        if not no_links:
+            diagram.add_link(
+                source=source, target=target,
+                src_label=link['source_intf'], trgt_label=link['target_intf'],
+                src_label_style=src_label_style, trgt_label_style=trgt_label_style,
+                style=style,
+                link_id=canonical_link_id(link)
+            )
+
+    hub_positions = {}
+    full_size_hubs = set()
+    for hub_index, hub in enumerate(sorted(hubs, key=natural_key)):
+        neighbours = links_by_hub[hub]
+        if not neighbours:
+            full_size_hubs.add(hub)
+            continue
+        if hub_layout == 'stub':
+            style = custom_styles.get(determine_node_group(hub, hub_nodes.get(hub), node_classifier), base_style)
+            for neighbour, links in neighbours.items():
+                stub = f"{hub}:{neighbour}"
+                x_pos, y_pos = positions[neighbour]
+                if layout == 'horizontal':
+                    stub_positions = {stub: (x_pos - stub_distance, y_pos + (node_size - stub_size) / 2)}
+                else:
+                    stub_positions = {stub: (x_pos + (node_size - stub_size) / 2, y_pos - stub_distance)}
+                diagram.add_node(id=stub, label=hub, x_pos=format_number(stub_positions[stub][0]), y_pos=format_number(stub_positions[stub][1]), style=style, width=stub_size, height=stub_size)
+                hub_positions[stub] = stub_positions[stub]
+                stub_positions[neighbour] = positions[neighbour]
+                for link_index, link in enumerate(links):
+                    source, target = (stub, neighbour) if link['source'] == hub else (neighbour, stub)
+                    unique_link_style = create_links(base_style=link_style, positions=stub_positions, source=source, target=target, source_graphlevel=0 if source == stub else 1, target_graphlevel=0 if target == stub else 1, adjacency=None, layout='horizontal' if layout == 'horizontal' else 'vertical', link_index=link_index, total_links=len(links))
+                    add_link(link, source, target, unique_link_style)
+            continue
+
+        # Bus bar spanning all neighbours, stacked before the first graph-level
+        offset = 100 + hub_index * 30
+        xs = [positions[n][0] for n in neighbours]
+        ys = [positions[n][1] for n in neighbours]
+        if layout == 'horizontal':
+            bar_x, bar_y = min(xs) - offset, min(ys)
+            bar_width, bar_height = 10, max(ys) - min(ys) + node_size
+        else:
+            bar_x, bar_y = min(xs), min(ys) - offset
+            bar_width, bar_height = max(xs) - min(xs) + node_size, 10
+        diagram.add_node(id=hub, label=hub, x_pos=format_number(bar_x), y_pos=format_number(bar_y), style=bus_style, width=format_number(bar_width), height=format_number(bar_height))
+        hub_positions[hub] = (bar_x, bar_y)
+
+        for neighbour, links in neighbours.items():
+            x_pos, y_pos = positions[neighbour]
+            for link_index, link in enumerate(links):
+                step = 0.5 if len(links) == 1 else format_number(0.25 + 0.5 * (link_index / (len(links) - 1)), 4)
+                # Attach the link to the bar right in front of the neighbour so it stays straight
+                if layout == 'horizontal':
+                    node_anchor = (0, step)
+                    bar_anchor = (1, format_number((y_pos + step * node_size - bar_y) / bar_height, 4))
+                else:
+                    node_anchor = (step, 0)
+                    bar_anchor = (format_number((x_pos + step * node_size - bar_x) / bar_width, 4), 1)
+                if link['source'] == hub:
+                    (exitX, exitY), (entryX, entryY), source, target = bar_anchor, node_anchor, hub, neighbour
+                else:
+                    (exitX, exitY), (entryX, entryY), source, target = node_anchor, bar_anchor, neighbour, hub
+                unique_link_style = f"{link_style}entryY={entryY};exitY={exitY};entryX={entryX};exitX={exitX};"
+                add_link(link, source, target, unique_link_style)
+
+    if hub_layout == 'stub':
+        # Stubs cannot be linked to each other, so hubs linked to other hubs need a full-size node as well
+        full_size_hubs |= {link['source'] for link in inter_hub_links} | {link['target'] for link in inter_hub_links}
+    if full_size_hubs:
+        # Line the full-size hubs up before the first graph-level, beyond the bus bars stacked there
+        distance = 2 * stub_distance if hub_layout == 'stub' else max(2 * stub_distance, 100 + 30 * len(hubs) + node_size)
+        min_x = min((x for x, _ in positions.values()), default=100)
+        min_y = min((y for _, y in positions.values()), default=100)
+        for i, hub in enumerate(sorted(full_size_hubs, key=natural_key)):
+            style = custom_styles.get(determine_node_group(hub, hub_nodes.get(hub), node_classifier), base_style)
+            if layout == 'horizontal':
+                hub_positions[hub] = (min_x - distance, min_y + i * 200)
+            else:
+                hub_positions[hub] = (min_x + i * 200, min_y - distance)
+            diagram.add_node(id=hub, label=hub, x_pos=format_number(hub_positions[hub][0]), y_pos=format_number(hub_positions[hub][1]), style=style, width=node_size, height=node_size)
+
+    for link in inter_hub_links:
+        add_link(link, link['source'], link['target'], link_style)
+
+    if verbose:
+        print(f"Placed {len(hubs)} hub(s) as {hub_layout}: {', '.join(sorted(hubs, key=natural_key))}")
+    return hub_positions
+
+def add_nodes_and_links(diagram, nodes, positions, links, node_graphlevels, no_links=False, layout='vertical', verbose=False, base_style=None, link_style=None, custom_styles=None, node_classifier=None, src_label_style=None, trgt_label_style=None):
     """
     Adds nodes and links to a diagram based on their positions, connectivity, and additional properties.
     Utilizes custom styles for nodes based on their roles (e.g., routers, switches, servers) and dynamically adjusts link styles to represent connectivity accurately.
@@ -460,41 +861,30 @@ def add_nodes_and_links(diagram, nodes, positions, links, node_graphlevels, no_l
     """
 
     for node_name, node_info in nodes.items():
-        # Check for 'graph-icon' label and map it to the corresponding group
-        labels = node_info.get('labels') or {}
-        icon_label = labels.get('graph-icon', 'default')
-        if icon_label in icon_to_group_mapping:
-            group = icon_to_group_mapping[icon_label]
-        else:
-            # Determine the group based on the node's name if 'graph-icon' is not specified
-            if "client" in node_name:
-                group = "server"
-            elif "leaf" in node_name:
-                group = "leaf"
-            elif "spine" in node_name:
-                group = "spine"
-            elif "dcgw" in node_name:
-                group = "dcgw"
-            else:
-                group = "default"  # Fallback to 'default' if none of the conditions are met
-
+        group = determine_node_group(node_name, node_info, node_classifier)
         style = custom_styles.get(group, base_style)
         x_pos, y_pos = positions[node_name]
         # Add each node to the diagram with the given x and y position.
-        diagram.add_node(id=node_name, label=node_name, x_pos=x_pos, y_pos=y_pos, style=style, width=75, height=75)
+        diagram.add_node(id=node_name, label=node_name, x_pos=format_number(x_pos), y_pos=format_number(y_pos), style=style, width=75, height=75)
 
     # Initialize a counter for links between the same nodes
     link_counter = defaultdict(lambda: 0)
 
     total_links_between_nodes = defaultdict(int)
+    adjacency = defaultdict(set)
     for link in links:
         source, target = link['source'], link['target']
         link_key = tuple(sorted([source, target]))
         total_links_between_nodes[link_key] += 1
 
+        # Build adjacency list
+        adjacency[source].add(target)
+        adjacency[target].add(source)
+
     for link in links:
         source, target = link['source'], link['target']
         source_intf, target_intf = link['source_intf'], link['target_intf']
+        link_id = canonical_link_id(link)
         source_graphlevel = node_graphlevels.get(source.split(':')[0], -1)
         target_graphlevel = node_graphlevels.get(target.split(':')[0], -1)
         link_key = tuple(sorted([source, target]))
@@ -507,14 +897,6 @@ def add_nodes_and_links(diagram, nodes, positions, links, node_graphlevels, no_l
         source_graphlevel = node_graphlevels[source]
         target_graphlevel = node_graphlevels[target]
 
-        adjacency = defaultdict(set)
-
-        # Build adjacency list
-        for link in links:
-            src, dst = link['source'], link['target']
-            adjacency[src].add(dst)
-            adjacency[dst].add(src)
-
         unique_link_style = create_links(base_style=link_style, positions=positions, source=source, target=target, source_graphlevel=source_graphlevel, target_graphlevel=target_graphlevel, link_index=link_index, total_links=total_links, adjacency=adjacency, layout=layout)
 
         # Add the link to the diagram with the determined unique style
@@ -523,14 +905,318 @@ def add_nodes_and_links(diagram, nodes, positions, links, node_graphlevels, no_l
                 source=source, target=target,
                 src_label=source_intf, trgt_label=target_intf,
                 src_label_style=src_label_style, trgt_label_style=trgt_label_style,
-                style=unique_link_style
-                link_id=f"{source}:{source_intf}:{target}:{target_intf}"
+                style=unique_link_style,
+                link_id=link_id
             )
 
-def load_styles_from_config(config_path):
-    with open(config_path, 'r') as file:
-        config = yaml.safe_load(file)
+def add_groups(diagram, node_groups, positions, group_style=None, collapsed=False, verbose=False):
+    """
+    Adds a container (swimlane) for every group, sized to enclose the positions of its nodes.
+    Collapsed containers only show their title bar until they are expanded in draw.io, which keeps
+    large diagrams light to open; their expanded size is kept as the alternate bounds.
+    Returns a dictionary mapping each group to its container id and top left corner.
+    """
+    node_size = 75
+    members = defaultdict(list)
+    for node, group in node_groups.items():
+        if node in positions:
+            members[group].append(node)
+
+    containers = {}
+    for group in sorted(members, key=natural_key):
+        xs = [positions[node][0] for node in members[group]]
+        ys = [positions[node][1] for node in members[group]]
+        x, y = min(xs) - GROUP_PADDING, min(ys) - GROUP_PADDING - GROUP_HEADER
+        width, height = max(xs) + node_size + GROUP_PADDING - x, max(ys) + node_size + GROUP_PADDING - y
+        container_id = f"group:{group}"
+        diagram.add_node(id=container_id, label=group, x_pos=format_number(x), y_pos=format_number(y), style=group_style or DEFAULT_GROUP_STYLE, width=format_number(width), height=format_number(height))
+        if collapsed:
+            cell = diagram.current_root[-1].find('mxCell')
+            cell.set('collapsed', '1')
+            geometry = cell.find('mxGeometry')
+            geometry.set('height', str(GROUP_HEADER))
+            ET.SubElement(geometry, 'mxRectangle', {'x': str(format_number(x)), 'y': str(format_number(y)), 'width': str(format_number(width)), 'height': str(format_number(height)), 'as': 'alternateBounds'})
+        containers[group] = (container_id, x, y)
+        if verbose:
+            print(f"Group {group}: {len(members[group])} node(s) in a {format_number(width)}x{format_number(height)} container")
+
+    return containers
+
+def place_in_groups(diagram, node_groups, containers):
+    """
+    Moves the nodes of every group into its container, making their positions relative to it.
+    """
+    for element in diagram.current_root:
+        group = node_groups.get(element.get('id')) if element.tag == 'object' else None
+        if group not in containers:
+            continue
+        container_id, container_x, container_y = containers[group]
+        cell = element.find('mxCell')
+        cell.set('parent', container_id)
+        geometry = cell.find('mxGeometry')
+        geometry.set('x', str(format_number(float(geometry.get('x', 0)) - container_x)))
+        geometry.set('y', str(format_number(float(geometry.get('y', 0)) - container_y)))
+
+def route_links(diagram, positions, node_size=75, track_spacing=10, verbose=False):
+    """
+    Computes orthogonal waypoints for the links between the nodes at the given positions and stores them in the
+    geometry of each link, so draw.io draws the links as given instead of routing them whenever the diagram is opened or moved.
+    A link leaves its node towards the channel, the free space between that row (or column) of nodes and the next one,
+    crosses the channel along a track, then runs straight to its target. Nodes that overlap along the axis form one row,
+    so nodes moved slightly by the layout share their channels. The routed links on one side of a node get distinct ports,
+    spread along that side in the order of the nodes at their other end, so their legs do not lie on top of each other.
+    Links crossing the same channel are assigned tracks with the left-edge algorithm: links whose crossings overlap
+    get separate tracks, the others share one.
+    Links whose nodes do not face each other across a channel are left to draw.io.
+    Returns the number of routed links.
+    """
+    # Rows (index 1) and columns (index 0) of nodes, as the bands they cover along the axis
+    bands = [node_bands([position[axis] for position in positions.values()], node_size) for axis in (0, 1)]
+    band_starts = [[band[0] for band in axis_bands] for axis_bands in bands]
+
+    links, ports = [], defaultdict(list)
+    for element in diagram.current_root:
+        cell = element.find('mxCell') if element.tag == 'object' else None
+        if cell is None or cell.get('edge') != '1' or cell.get('source') not in positions or cell.get('target') not in positions:
+            continue
+        style = parse_style(cell.get('style', ''))
+        exits = [float(style.get('exitX', 0.5)), float(style.get('exitY', 0.5))]
+        entries = [float(style.get('entryX', 0.5)), float(style.get('entryY', 0.5))]
+        # The axis along which the link goes from its source to its target: 1 if it leaves through the top or bottom side
+        axis = 1 if {exits[1], entries[1]} == {0, 1} else 0 if {exits[0], entries[0]} == {0, 1} else None
+        if axis is None:
+            continue
+        source_id, target_id = cell.get('source'), cell.get('target')
+        source, target = positions[source_id], positions[target_id]
+        facing = exits[axis] == 1 if source[axis] < target[axis] else entries[axis] == 1
+        # The link crosses the channel after the row of its first node, which must end before the row of the other node
+        band = bisect.bisect_right(band_starts[axis], min(source[axis], target[axis])) - 1
+        if not facing or max(source[axis], target[axis]) < bands[axis][band][1]:
+            continue
+        links.append((element.get('id'), cell, axis, band, exits, entries))
+        ports[(source_id, axis, exits[axis])].append((target[1 - axis], element.get('id'), exits))
+        ports[(target_id, axis, entries[axis])].append((source[1 - axis], element.get('id'), entries))
+
+    # Spread the ports on each side of a node evenly, in the order of the nodes at the other end of their links, and
+    # move them by half a step where they would meet the ports of another node facing the same channel
+    taken = defaultdict(set)
+    for (node, axis, side), side_links in sorted(ports.items(), key=lambda item: (item[0][1], positions[item[0][0]][item[0][1]], positions[item[0][0]][1 - item[0][1]], natural_key(item[0][0]), item[0][2])):
+        side_links.sort(key=lambda port: (port[0], natural_key(port[1])))
+        channel = (axis, bisect.bisect_right(band_starts[axis], positions[node][axis]) - 1 - (side == 0))
+        for shift in (0, 0.5, -0.5):
+            fractions = [format_number((index + 1 + shift) / (len(side_links) + 1), 4) for index in range(len(side_links))]
+            coordinates = {format_number(positions[node][1 - axis] + fraction * node_size) for fraction in fractions}
+            if not coordinates & taken[channel]:
+                break
+        taken[channel] |= coordinates
+        for fraction, (_, _, anchor) in zip(fractions, side_links):
+            anchor[1 - axis] = fraction
+
+    channels = defaultdict(list)
+    for link_id, cell, axis, band, exits, entries in links:
+        cell.set('style', update_style(cell.get('style', ''), {'exitX': exits[0], 'exitY': exits[1], 'entryX': entries[0], 'entryY': entries[1]}))
+        source, target = positions[cell.get('source')], positions[cell.get('target')]
+        start = tuple(source[i] + exits[i] * node_size for i in (0, 1))
+        end = tuple(target[i] + entries[i] * node_size for i in (0, 1))
+        if start[1 - axis] != end[1 - axis]:
+            low, high = sorted((start[1 - axis], end[1 - axis]))
+            channels[(axis, band)].append((low, high, link_id, cell, start, end))
+
+    routed, max_tracks = 0, 0
+    for (axis, band), crossings in sorted(channels.items(), key=lambda item: item[0]):
+        channel_start, channel_end = bands[axis][band][1], bands[axis][band + 1][0]
+        # Heap of (end of the last crossing on the track, track), to reuse the track that frees up first
+        free_at, assigned = [], []
+        for low, high, link_id, cell, start, end in sorted(crossings, key=lambda crossing: crossing[:3]):
+            if free_at and free_at[0][0] + track_spacing <= low:
+                _, track = heapq.heappop(free_at)
+            else:
+                track = len(free_at)
+            heapq.heappush(free_at, (high, track))
+            assigned.append((track, cell, start, end))
+
+        track_count = len(free_at)
+        max_tracks = max(max_tracks, track_count)
+        for track, cell, start, end in assigned:
+            # Spread the tracks evenly across the channel
+            offset = channel_start + (channel_end - channel_start) * (track + 1) / (track_count + 1)
+            points = [(start[0], offset), (end[0], offset)] if axis == 1 else [(offset, start[1]), (offset, end[1])]
+            waypoints = ET.SubElement(cell.find('mxGeometry'), 'Array', {'as': 'points'})
+            for x, y in points:
+                ET.SubElement(waypoints, 'mxPoint', {'x': str(format_number(x)), 'y': str(format_number(y))})
+            routed += 1
 
+    if verbose:
+        print(f"Routed {routed} link(s) through {len(channels)} channel(s), with at most {max_tracks} track(s) per channel")
+    return routed
+
+def node_bands(coordinates, node_size):
+    """
+    Merges the spans of nodes along one axis, from each coordinate to coordinate + node_size, into the sorted list
+    of [start, end] bands covered by overlapping nodes.
+    """
+    bands = []
+    for coordinate in sorted(set(coordinates)):
+        if bands and coordinate < bands[-1][1]:
+            bands[-1][1] = max(bands[-1][1], coordinate + node_size)
+        else:
+            bands.append([coordinate, coordinate + node_size])
+    return bands
+
+def update_style(style, values):
+    """
+    Replaces the values of the given keys in a draw.io style string, keeping the order of its parts.
+    """
+    parts = []
+    for part in style.split(';'):
+        key = part.split('=', 1)[0]
+        parts.append(f"{key}={values[key]}" if '=' in part and key in values else part)
+    return ';'.join(parts)
+
+def parse_style(style):
+    """
+    Splits a draw.io style string into a dictionary of its key=value parts.
+    """
+    return dict(part.split('=', 1) for part in style.split(';') if '=' in part)
+
+def icon_href(image):
+    """
+    Converts a draw.io image style value to a URI usable in SVG.
+    draw.io drops ';base64' from data URIs because ';' separates style entries.
+    """
+    if image.startswith('data:') and ';base64' not in image.split(',', 1)[0]:
+        media_type, data = image.split(',', 1)
+        return f"{media_type};base64,{data}"
+    return image
+
+def edge_points(cell, geometry_by_id):
+    """
+    Returns the points of an edge: the exit point on the source, any waypoints and the entry point on the target.
+    Exit and entry points come from the exitX/exitY and entryX/entryY fractions of the style, defaulting to the center.
+    """
+    style = parse_style(cell.get('style', ''))
+    sx, sy, sw, sh = geometry_by_id[cell.get('source')]
+    tx, ty, tw, th = geometry_by_id[cell.get('target')]
+    points = [(sx + float(style.get('exitX', 0.5)) * sw, sy + float(style.get('exitY', 0.5)) * sh)]
+    waypoints = cell.find("mxGeometry/Array[@as='points']")
+    if waypoints is not None:
+        points.extend((float(point.get('x', 0)), float(point.get('y', 0))) for point in waypoints)
+    points.append((tx + float(style.get('entryX', 0.5)) * tw, ty + float(style.get('entryY', 0.5)) * th))
+    return points
+
+def point_along(points, fraction):
+    """
+    Returns the point at the given fraction of the length of a polyline.
+    """
+    segments = [(a, b, math.dist(a, b)) for a, b in zip(points, points[1:])]
+    remaining = fraction * sum(length for _, _, length in segments)
+    for (ax, ay), (bx, by), length in segments:
+        if remaining <= length and length > 0:
+            ratio = remaining / length
+            return ax + (bx - ax) * ratio, ay + (by - ay) * ratio
+        remaining -= length
+    return points[-1]
+
+def write_svg(diagram, file, margin=40, font_size=12):
+    """
+    Renders the current page of a diagram as an SVG preview, without running draw.io.
+    Every distinct icon is embedded once in <defs> and referenced with <use>; links, nodes and labels are
+    streamed to the file one element at a time, links first so they are drawn below the nodes.
+    """
+    vertices, containers, edges, edge_labels = [], [], [], defaultdict(list)
+    origins = {}
+    for element in diagram.current_root:
+        cell = element.find('mxCell') if element.tag == 'object' else element
+        if cell is None:
+            continue
+        label = element.get('label', '') if element.tag == 'object' else element.get('value', '')
+        if cell.get('edge') == '1':
+            edges.append((element.get('id'), cell))
+        elif cell.get('vertex') == '1':
+            geometry = cell.find('mxGeometry')
+            if geometry.get('relative') is not None:
+                # Link labels are positioned relative to their link, from -1 (source) to 1 (target)
+                edge_labels[cell.get('parent')].append((float(geometry.get('x', 0)), label))
+                continue
+
+            # Nodes within a group container are positioned relative to it; previews always show groups expanded
+            bounds = geometry.find("mxRectangle[@as='alternateBounds']") if cell.get('collapsed') == '1' else None
+            x, y, w, h = (float((geometry if bounds is None else bounds).get(attr, 0)) for attr in ('x', 'y', 'width', 'height'))
+            parent_x, parent_y = origins.get(cell.get('parent'), (0, 0))
+            x, y = x + parent_x, y + parent_y
+            style = parse_style(cell.get('style', ''))
+            if 'swimlane' in cell.get('style', '') or style.get('container') == '1':
+                origins[element.get('id')] = (x, y)
+                containers.append((label, style, (x, y, w, h)))
+            else:
+                vertices.append((element.get('id'), label, style, (x, y, w, h)))
+
+    geometry_by_id = {vertex_id: geometry for vertex_id, _, _, geometry in vertices}
+    icons = {}
+    for _, _, style, _ in vertices:
+        if 'image' in style and style['image'] not in icons:
+            icons[style['image']] = f"icon{len(icons)}"
+
+    boxes = [geometry for _, _, _, geometry in vertices] + [geometry for _, _, geometry in containers]
+    if boxes:
+        min_x = min(x for x, _, _, _ in boxes) - margin
+        min_y = min(y for _, y, _, _ in boxes) - margin
+        max_x = max(x + w for x, _, w, _ in boxes) + margin
+        max_y = max(y + h for _, y, _, h in boxes) + margin
+    else:
+        min_x = min_y = 0
+        max_x = max_y = 2 * margin
+    width, height = format_number(max_x - min_x), format_number(max_y - min_y)
+
+    file.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+               f'viewBox="{format_number(min_x)} {format_number(min_y)} {width} {height}" '
+               f'font-family="Helvetica, Arial, sans-serif" font-size="{font_size}">\n')
+    file.write('<defs>\n')
+    for image, icon_id in icons.items():
+        file.write(f'<symbol id="{icon_id}" viewBox="0 0 1 1" preserveAspectRatio="xMidYMid meet">'
+                   f'<image width="1" height="1" preserveAspectRatio="xMidYMid meet" href={quoteattr(icon_href(image))}/></symbol>\n')
+    file.write('</defs>\n')
+
+    # Group containers first, so they are drawn below everything else, with their title in the title bar
+    for label, style, (x, y, w, h) in containers:
+        file.write(f'<rect x="{format_number(x)}" y="{format_number(y)}" width="{format_number(w)}" height="{format_number(h)}" '
+                   f'rx="{6 if style.get("rounded") == "1" else 0}" fill={quoteattr(style.get("fillColor", "none"))} stroke={quoteattr(style.get("strokeColor", "#000000"))}/>\n')
+        header = float(style.get('startSize', GROUP_HEADER))
+        file.write(f'<text x="{format_number(x + w / 2)}" y="{format_number(y + header / 2 + font_size / 3)}" text-anchor="middle" '
+                   f'font-weight="bold" fill={quoteattr(style.get("fontColor", "#000000"))}>{escape(label)}</text>\n')
+
+    for edge_id, cell in edges:
+        if cell.get('source') not in geometry_by_id or cell.get('target') not in geometry_by_id:
+            continue
+        style = parse_style(cell.get('style', ''))
+        points = edge_points(cell, geometry_by_id)
+        coordinates = ' '.join(f"{format_number(x)},{format_number(y)}" for x, y in points)
+        file.write(f'<polyline points="{coordinates}" fill="none" stroke={quoteattr(style.get("strokeColor", "#000000"))} '
+                   f'stroke-width="{style.get("strokeWidth", 1)}"/>\n')
+        for position, label in edge_labels.get(edge_id, []):
+            x, y = point_along(points, (position + 1) / 2)
+            file.write(f'<text x="{format_number(x)}" y="{format_number(y)}" text-anchor="middle" dominant-baseline="middle" '
+                       f'font-size="{font_size - 2}" fill={quoteattr(style.get("fontColor", style.get("strokeColor", "#000000")))}>{escape(label)}</text>\n')
+
+    for vertex_id, label, style, (x, y, w, h) in vertices:
+        position = f'x="{format_number(x)}" y="{format_number(y)}" width="{format_number(w)}" height="{format_number(h)}"'
+        if 'image' in style:
+            file.write(f'<use href="#{icons[style["image"]]}" {position}/>\n')
+        else:
+            file.write(f'<rect {position} fill={quoteattr(style.get("fillColor", "#ffffff"))} stroke={quoteattr(style.get("strokeColor", "#000000"))}/>\n')
+
+        # Place the label like draw.io's labelPosition/verticalLabelPosition would
+        label_x, anchor = {'left': (x - 4, 'end'), 'right': (x + w + 4, 'start')}.get(style.get('labelPosition'), (x + w / 2, 'middle'))
+        label_y = {'top': y - 4, 'bottom': y + h + font_size}.get(style.get('verticalLabelPosition'), y + h / 2 + font_size / 3)
+        file.write(f'<text x="{format_number(label_x)}" y="{format_number(label_y)}" text-anchor="{anchor}" '
+                   f'fill={quoteattr(style.get("fontColor", "#000000"))}>{escape(label)}</text>\n')
+
+    file.write('</svg>\n')
+
+def load_styles(config):
+    """
+    Prepares the styles of a theme from its parsed configuration.
+    """
     base_style = config['base_style']
     link_style = config['link_style']
     src_label_style = config['src_label_style']
@@ -539,47 +1225,253 @@ def load_styles_from_config(config_path):
     # Prepend base_style to each custom style
     custom_styles = {key: base_style + value for key, value in config['custom_styles'].items()}
     
-    icon_to_group_mapping = config['icon_to_group_mapping']
+    bus_style = config.get('bus_style', DEFAULT_BUS_STYLE)
+    group_style = config.get('group_style', DEFAULT_GROUP_STYLE)
+
+    # Compile the 'graph-icon' mapping and the node rules once into a single classifier
+    node_classifier = NodeClassifier(rules=config.get('node_rules'), icon_to_group_mapping=config.get('icon_to_group_mapping'))
+
+    return base_style, link_style, src_label_style, trgt_label_style, custom_styles, node_classifier, bus_style, group_style
 
-    return base_style, link_style, src_label_style, trgt_label_style, custom_styles, icon_to_group_mapping
+def load_styles_from_config(config_path):
+    with open(config_path, 'r') as file:
+        config = yaml.safe_load(file)
 
+    return load_styles(config)
 
-def main(input_file, output_file, theme, include_unlinked_nodes=False, no_links=False, layout='vertical', verbose=False):
+def theme_path(theme):
     """
-    Generates a diagram from a given topology definition file, organizing and displaying nodes and links.
-    
-    Processes an input YAML file containing node and link definitions, extracts relevant information,
-    and applies logic to determine node positions and connectivity. The function supports filtering out unlinked nodes,
-    optionally excluding links, choosing the layout orientation, and toggling verbose output for detailed processing logs.
-    
-    Outputs the generated diagram to a specified file, creating directories as needed.
+    Returns the style config file of a built-in theme ('bright', 'dark'), or the theme itself as a path to a custom file.
+    """
+    if theme in ['bright', 'dark']:
+        return os.path.join(SCRIPT_DIR, 'styles', f'{theme}.yaml')
+    # Assume the user has provided a custom path
+    return theme
 
-    Parameters:
-    - input_file (str): Path to the input YAML file with topology definitions.
-    - output_file (str): Path where the output diagram file will be saved.
-    - include_unlinked_nodes (bool): Flag to include nodes that do not have any links.
-    - no_links (bool): Flag to exclude links from the diagram.
-    - layout (str): Layout orientation ('vertical' or 'horizontal') for the diagram.
-    - verbose (bool, optional): If True, enables detailed logging of the function's operations.
+@functools.lru_cache(maxsize=32)
+def load_theme(theme):
     """
+    Loads the styles of a theme once per process for clab_to_drawio; the result is shared by all callers.
+    """
+    return load_styles_from_config(theme_path(theme))
 
-    with open(input_file, 'r') as file:
-        containerlab_data = yaml.safe_load(file)
+def parse_endpoint(endpoint):
+    """
+    Returns the node and interface of a link endpoint, given either as a "node:interface" string
+    or in containerlab's extended link format, as a mapping with 'node' and 'interface'.
+    """
+    if isinstance(endpoint, dict):
+        return endpoint['node'], endpoint['interface']
+    return endpoint.split(":")
 
-   # Nodes remain the same
+def extract_links(containerlab_data):
+    """
+    Prepares the links list by extracting source and target from each link's 'endpoints'.
+    Links to nodes that are not defined in the topology are skipped. Links are returned in canonical order.
+    """
     nodes = containerlab_data['topology']['nodes']
-
-    # Prepare the links list by extracting source and target from each link's 'endpoints'
     links = []
     for link in containerlab_data['topology'].get('links', []):
         endpoints = link.get('endpoints')
         if endpoints:
-            source_node, source_intf = endpoints[0].split(":")
-            target_node, target_intf = endpoints[1].split(":")
+            source_node, source_intf = parse_endpoint(endpoints[0])
+            target_node, target_intf = parse_endpoint(endpoints[1])
             # Add link only if both source and target nodes exist
             if source_node in nodes and target_node in nodes:
                 links.append({'source': source_node, 'target': target_node, 'source_intf': source_intf, 'target_intf': target_intf})
 
+    # Canonical order, so the output does not depend on the order of the links in the file
+    links.sort(key=lambda link: (natural_key(canonical_link_id(link)), natural_key(link['source']), natural_key(link['source_intf'])))
+    return links
+
+def load_topology_file(input_file):
+    """
+    Reads a containerlab topology: a .clab.yml file, or the topology-data.json file containerlab writes
+    when a lab is deployed, which also covers labs generated from templates.
+    """
+    if os.path.splitext(input_file)[1].lower() == '.json':
+        return load_topology_data(input_file)
+    with open(input_file, 'r') as file:
+        return yaml.safe_load(file)
+
+def compute_layout(nodes, links, layout='vertical', verbose=False, seed=0, iterations=300, time_budget=None, convergence_threshold=0.5):
+    """
+    Runs the layout step for the given nodes and links.
+    Returns the graph level and the (x, y) position of each node.
+    """
+    sorted_nodes, node_graphlevels, connections = assign_graphlevels(nodes, links, verbose=verbose)
+    if layout == 'force':
+        # Start from the hierarchical layout when the topology has more than one level
+        seed_positions = None
+        if len(set(node_graphlevels.values())) > 1:
+            seed_positions = calculate_positions(sorted_nodes, links, node_graphlevels, connections, layout='vertical', verbose=verbose)
+        positions = force_directed_layout(nodes, links, seed_positions=seed_positions, seed=seed, iterations=iterations, time_budget=time_budget, tolerance=convergence_threshold, verbose=verbose)
+    else:
+        positions = calculate_positions(sorted_nodes, links, node_graphlevels, connections, layout=layout, verbose=verbose)
+    return node_graphlevels, positions
+
+def compute_grouped_layout(nodes, links, node_groups, layout='vertical', verbose=False, seed=0, iterations=300, time_budget=None, convergence_threshold=0.5):
+    """
+    Lays out a topology whose nodes belong to groups (containerlab's 'group' field).
+    Each group is laid out on its own with compute_layout, then the groups, and the nodes without a group,
+    are arranged as blocks: blocks go to the graph-level their nodes have on average, and within a level they
+    are ordered by the position of the blocks they connect to in the previous levels.
+    Returns the graph level and the absolute (x, y) position of each node, like compute_layout.
+    """
+    node_size, spacing = 75, 100
+    primary = 0 if layout == 'horizontal' else 1
+
+    _, node_graphlevels, _ = assign_graphlevels(nodes, links, verbose=verbose)
+
+    # One block per group, and one per node without a group
+    block_of = {node: ('group', node_groups[node]) if node in node_groups else ('node', node) for node in nodes}
+    block_nodes, block_links, block_neighbours = defaultdict(dict), defaultdict(list), defaultdict(set)
+    for node, info in nodes.items():
+        block_nodes[block_of[node]][node] = info
+    for link in links:
+        source_block, target_block = block_of[link['source']], block_of[link['target']]
+        if source_block == target_block:
+            block_links[source_block].append(link)
+        else:
+            block_neighbours[source_block].add(target_block)
+            block_neighbours[target_block].add(source_block)
+
+    # Lay out every block on its own, relative to its top left corner
+    local_positions, block_sizes, rows = {}, {}, defaultdict(list)
+    for block in sorted(block_nodes, key=lambda block: (block[0], natural_key(block[1]))):
+        members = block_nodes[block]
+        if block[0] == 'group':
+            if verbose:
+                print(f"Laying out group {block[1]} with {len(members)} node(s)")
+            _, positions = compute_layout(members, block_links[block], layout=layout, verbose=verbose, seed=seed, iterations=iterations, time_budget=time_budget, convergence_threshold=convergence_threshold)
+            min_x = min(x for x, _ in positions.values())
+            min_y = min(y for _, y in positions.values())
+            positions = {node: (x - min_x + GROUP_PADDING, y - min_y + GROUP_PADDING + GROUP_HEADER) for node, (x, y) in positions.items()}
+            block_sizes[block] = (max(x for x, _ in positions.values()) + node_size + GROUP_PADDING,
+                                  max(y for _, y in positions.values()) + node_size + GROUP_PADDING)
+        else:
+            positions = {block[1]: (0, 0)}
+            block_sizes[block] = (node_size, node_size)
+        local_positions[block] = positions
+        rows[round(sum(node_graphlevels[node] for node in members) / len(members))].append(block)
+
+    # Arrange the blocks level by level, centering every level on the same axis
+    block_origins, block_centers = {}, {}
+    row_start = 0
+    for row in sorted(rows):
+        def barycenter(block):
+            placed = [block_centers[neighbour] for neighbour in block_neighbours[block] if neighbour in block_centers]
+            return sum(placed) / len(placed) if placed else float('inf')
+
+        blocks = sorted(rows[row], key=lambda block: (barycenter(block), block[0], natural_key(block[1])))
+        row_length = sum(block_sizes[block][1 - primary] for block in blocks) + spacing * (len(blocks) - 1)
+        cursor = -row_length / 2
+        for block in blocks:
+            origin = [0, 0]
+            origin[primary], origin[1 - primary] = row_start, cursor
+            block_origins[block] = tuple(origin)
+            block_centers[block] = cursor + block_sizes[block][1 - primary] / 2
+            cursor += block_sizes[block][1 - primary] + spacing
+        row_start += max(block_sizes[block][primary] for block in blocks) + spacing
+
+    # Shift everything so the diagram starts at (100, 100), like the other layouts
+    offset_x = 100 - min(x for x, _ in block_origins.values())
+    offset_y = 100 - min(y for _, y in block_origins.values())
+    positions = {}
+    for block, origin in block_origins.items():
+        for node, (x, y) in local_positions[block].items():
+            positions[node] = (format_number(origin[0] + x + offset_x), format_number(origin[1] + y + offset_y))
+
+    return node_graphlevels, positions
+
+def layout_to_dict(layout, node_graphlevels, positions):
+    """
+    Returns a computed layout as a JSON-serialisable dictionary, in the format read by layout_from_dict.
+    """
+    return {
+        'version': LAYOUT_FORMAT_VERSION,
+        'layout': layout,
+        'levels': {node: node_graphlevels[node] for node in sorted(positions, key=natural_key)},
+        'positions': {node: [format_number(positions[node][0]), format_number(positions[node][1])] for node in sorted(positions, key=natural_key)},
+    }
+
+def layout_from_dict(data):
+    """
+    Validates a layout dictionary as written by layout_to_dict (possibly edited by hand) and
+    returns it with the positions as (x, y) tuples. Raises ValueError if it is malformed.
+    """
+    if not isinstance(data, dict) or data.get('version') != LAYOUT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported layout format, expected a version {LAYOUT_FORMAT_VERSION} layout")
+    if data.get('layout') not in ('vertical', 'horizontal', 'force'):
+        raise ValueError(f"Unknown layout '{data.get('layout')}' in saved layout")
+    try:
+        positions = {str(node): (float(x), float(y)) for node, (x, y) in (data.get('positions') or {}).items()}
+        levels = {str(node): int(level) for node, level in (data.get('levels') or {}).items()}
+    except (TypeError, ValueError):
+        raise ValueError("Saved layout positions must be [x, y] pairs and levels integers")
+    positions = {node: (format_number(x), format_number(y)) for node, (x, y) in positions.items()}
+    return {'version': LAYOUT_FORMAT_VERSION, 'layout': data['layout'], 'levels': levels, 'positions': positions}
+
+def load_layout(layout_file):
+    """Reads a layout file written by --save-layout."""
+    with open(layout_file, 'r') as file:
+        return layout_from_dict(json.load(file))
+
+def save_layout(layout_data, layout_file):
+    """Writes a layout dictionary as compact JSON, one node per line so hand edits produce small diffs."""
+    lines = [f'{{"version":{layout_data["version"]},"layout":{json.dumps(layout_data["layout"])},']
+    for key in ('levels', 'positions'):
+        entries = [f"{json.dumps(node)}:{json.dumps(value, separators=(',', ':'))}" for node, value in layout_data[key].items()]
+        lines.append(f'"{key}":{{' + (',\n'.join(entries)) + '}' + (',' if key == 'levels' else '}'))
+    os.makedirs(os.path.dirname(layout_file) or ".", exist_ok=True)
+    with open(layout_file, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+
+class IdList(list):
+    """
+    Replacement for the per-page node and link id lists of N2G's drawio_diagram, which every added node and
+    link is checked against. Membership is answered from a set, so building a page is linear in its size.
+    """
+    __slots__ = ('id_set',)
+
+    def __init__(self, ids=()):
+        super().__init__(ids)
+        self.id_set = set(self)
+
+    def __contains__(self, id):
+        return id in self.id_set
+
+    def append(self, id):
+        super().append(id)
+        self.id_set.add(id)
+
+    def remove(self, id):
+        super().remove(id)
+        self.id_set.discard(id)
+
+def new_diagram(name):
+    """
+    Returns a drawio_diagram with one page of the given name, using IdList for its node and link ids.
+    """
+    diagram = drawio_diagram()
+    diagram.add_diagram(name)
+    diagram.nodes_ids[diagram.current_diagram_id] = IdList(diagram.nodes_ids[diagram.current_diagram_id])
+    diagram.edges_ids[diagram.current_diagram_id] = IdList(diagram.edges_ids[diagram.current_diagram_id])
+    return diagram
+
+def build_diagram(containerlab_data, styles, include_unlinked_nodes=False, no_links=False, layout='vertical', verbose=False, seed=0, iterations=300, time_budget=None, convergence_threshold=0.5, hub_layout='bus', hub_threshold=0, saved_layout=None, groups='none', routing='none'):
+    """
+    Lays out a parsed containerlab topology and returns it as a draw.io diagram, without touching any file.
+    styles is the tuple returned by load_styles. If saved_layout (as returned by layout_from_dict) is given,
+    the layout step is skipped for every node it has a position for. The remaining parameters are described in main.
+    Returns the diagram and the layout used, as a dictionary that layout_from_dict accepts.
+    """
+
+    # Nodes in canonical order, so the output does not depend on the order of the nodes in the file,
+    # with the kind, image and type they inherit from topology.kinds and topology.defaults
+    nodes = dict(sorted(resolve_nodes(containerlab_data).items(), key=lambda item: natural_key(item[0])))
+    links = extract_links(containerlab_data)
+
     if not include_unlinked_nodes:
         linked_nodes = set()
         for link in links:
@@ -587,25 +1479,143 @@ def main(input_file, output_file, theme, include_unlinked_nodes=False, no_links=
             linked_nodes.add(link['target'])
         nodes = {node: info for node, info in nodes.items() if node in linked_nodes}
 
-    sorted_nodes, node_graphlevels, connections = assign_graphlevels(nodes, links, verbose=verbose)
-    positions = calculate_positions(sorted_nodes, links, node_graphlevels, connections, layout=layout, verbose=verbose)
+    # Hubs are kept out of the layout and placed around their neighbours afterwards
+    hubs = set()
+    if hub_layout != 'none':
+        # The kinds are already resolved, including the one inherited from topology.defaults
+        hubs = detect_hubs(nodes, links, degree_threshold=hub_threshold, verbose=verbose)
+        if hubs == set(nodes):
+            hubs = set()
+    hub_nodes = {node: info for node, info in nodes.items() if node in hubs}
+    hub_links = [link for link in links if link['source'] in hubs or link['target'] in hubs]
+    nodes = {node: info for node, info in nodes.items() if node not in hubs}
+    links = [link for link in links if link['source'] not in hubs and link['target'] not in hubs]
+
+    node_groups = {}
+    if groups != 'none':
+        node_groups = {node: str(info['group']) for node, info in nodes.items() if info and info.get('group') is not None}
+
+    if saved_layout:
+        # The anchors of the links depend on the orientation the positions were computed for
+        layout = saved_layout['layout']
+        node_graphlevels, positions = {}, {}
+        for node in nodes:
+            if node in saved_layout['positions'] and node in saved_layout['levels']:
+                node_graphlevels[node] = saved_layout['levels'][node]
+                positions[node] = saved_layout['positions'][node]
+        missing_nodes = [node for node in nodes if node not in positions]
+        if missing_nodes:
+            # Lay out the whole topology and only take the positions of the nodes the saved layout lacks
+            if verbose:
+                print(f"Saved layout has no position for {len(missing_nodes)} node(s), computing them: {', '.join(missing_nodes)}")
+            computed_graphlevels, computed_positions = compute_layout(nodes, links, layout=layout, verbose=verbose, seed=seed, iterations=iterations, time_budget=time_budget, convergence_threshold=convergence_threshold)
+            for node in missing_nodes:
+                node_graphlevels[node] = computed_graphlevels[node]
+                positions[node] = computed_positions[node]
+    elif node_groups:
+        node_graphlevels, positions = compute_grouped_layout(nodes, links, node_groups, layout=layout, verbose=verbose, seed=seed, iterations=iterations, time_budget=time_budget, convergence_threshold=convergence_threshold)
+    else:
+        node_graphlevels, positions = compute_layout(nodes, links, layout=layout, verbose=verbose, seed=seed, iterations=iterations, time_budget=time_budget, convergence_threshold=convergence_threshold)
 
-    # Create a draw.io diagram instance
-    diagram = drawio_diagram()
+    # Create a draw.io diagram instance with a diagram page
+    diagram = new_diagram("Network Topology")
 
-    # Add a diagram page
-    diagram.add_diagram("Network Topology")
+    # Add the group containers first, as draw.io expects a parent before its children
+    base_style, link_style, src_label_style, trgt_label_style, custom_styles, node_classifier, bus_style, group_style = styles
+    containers = add_groups(diagram, node_groups, positions, group_style=group_style, collapsed=groups == 'collapsed', verbose=verbose) if node_groups else {}
 
-    if theme in ['bright', 'dark']:
-        config_path = os.path.join(script_dir, f'styles/{theme}.yaml')
-    else:
-        # Assume the user has provided a custom path
-        config_path = theme
+    # Add nodes and links to the diagram
+    add_nodes_and_links(diagram, nodes, positions, links, node_graphlevels, no_links=no_links, layout=layout, verbose=verbose, base_style=base_style, link_style=link_style, custom_styles=custom_styles, node_classifier=node_classifier, src_label_style=src_label_style, trgt_label_style=trgt_label_style)
+    if hubs:
+        add_hubs(diagram, hubs, hub_links, positions, hub_layout=hub_layout, no_links=no_links, layout=layout, verbose=verbose, base_style=base_style, link_style=link_style, custom_styles=custom_styles, node_classifier=node_classifier, src_label_style=src_label_style, trgt_label_style=trgt_label_style, bus_style=bus_style, hub_nodes=hub_nodes)
+    if routing == 'orthogonal' and not no_links:
+        # The links of nodes hidden in a collapsed container are drawn from the container, so leave them to draw.io
+        routed_positions = {node: position for node, position in positions.items() if groups != 'collapsed' or node not in node_groups}
+        route_links(diagram, routed_positions, verbose=verbose)
+    if containers:
+        place_in_groups(diagram, node_groups, containers)
+
+    return diagram, layout_to_dict(layout, node_graphlevels, positions)
+
+def clab_to_drawio(topology, options=None):
+    """
+    Converts a parsed containerlab topology (the dictionary loaded from a .clab.yml) to a draw.io document.
 
+    Nothing is read or written apart from the theme file, which is loaded once per process, and nothing is
+    printed, so it can be called concurrently from several threads.
 
-    # Add nodes and links to the diagram
-    base_style, link_style, src_label_style, trgt_label_style, custom_styles, icon_to_group_mapping = load_styles_from_config(config_path)
-    add_nodes_and_links(diagram, nodes, positions, links, node_graphlevels, no_links=no_links, layout=layout, verbose=verbose, base_style=base_style, link_style=link_style, custom_styles=custom_styles, icon_to_group_mapping=icon_to_group_mapping, src_label_style=src_label_style, trgt_label_style=trgt_label_style)
+    options is an optional dictionary with any of the keys:
+    - theme (str or dict): 'bright' (default), 'dark', the path to a custom style config file, or its parsed content.
+    - format (str): 'drawio' (default) for the draw.io XML, or 'svg' for an SVG preview.
+    - include_unlinked_nodes, no_links, layout, seed, iterations, time_budget, convergence_threshold,
+      hub_layout, hub_threshold, groups, routing: as described in main.
+    - saved_layout (dict): A layout as written by --save-layout (see layout_to_dict), used instead of computing one.
+
+    Returns the document as a string.
+    """
+    options = dict(options or {})
+    theme = options.pop('theme', 'bright')
+    output_format = options.pop('format', 'drawio')
+    unknown = set(options) - set(DIAGRAM_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown option(s): {', '.join(sorted(unknown))}")
+    if output_format not in ('drawio', 'svg'):
+        raise ValueError(f"Unknown format '{output_format}', expected 'drawio' or 'svg'")
+    for option, choices in OPTION_CHOICES.items():
+        if option in options and options[option] not in choices:
+            raise ValueError(f"Unknown {option} '{options[option]}', expected one of {', '.join(repr(choice) for choice in choices)}")
+
+    if options.get('saved_layout'):
+        options['saved_layout'] = layout_from_dict(options['saved_layout'])
+
+    styles = load_styles(theme) if isinstance(theme, dict) else load_theme(theme)
+    diagram, _ = build_diagram(topology, styles, **options)
+
+    if output_format == 'svg':
+        output = io.StringIO()
+        write_svg(diagram, output)
+        return output.getvalue()
+    return diagram.dump_xml()
+
+def main(input_file, output_file, theme, include_unlinked_nodes=False, no_links=False, layout='vertical', verbose=False, seed=0, iterations=300, time_budget=None, convergence_threshold=0.5, hub_layout='bus', hub_threshold=0, layout_from=None, save_layout_file=None, groups='none', routing='none'):
+    """
+    Generates a diagram from a given topology definition file, organizing and displaying nodes and links.
+    
+    Processes an input YAML file containing node and link definitions, extracts relevant information,
+    and applies logic to determine node positions and connectivity. The function supports filtering out unlinked nodes,
+    optionally excluding links, choosing the layout orientation, and toggling verbose output for detailed processing logs.
+    
+    Outputs the generated diagram to a specified file, creating directories as needed.
+
+    Parameters:
+    - input_file (str): Path to the input YAML file with topology definitions, or to a containerlab topology-data.json file.
+    - output_file (str): Path where the output diagram file will be saved.
+    - include_unlinked_nodes (bool): Flag to include nodes that do not have any links.
+    - no_links (bool): Flag to exclude links from the diagram.
+    - layout (str): Layout orientation ('vertical' or 'horizontal') for the diagram, or 'force' for a force-directed layout.
+    - verbose (bool, optional): If True, enables detailed logging of the function's operations.
+    - seed (int): Seed for the pseudo-random initial placement of the force-directed layout.
+    - iterations (int): Maximum number of iterations of the force-directed layout.
+    - time_budget (float, optional): Maximum time in seconds spent in the force-directed layout.
+    - convergence_threshold (float): The force-directed layout stops once no node moves more than this many pixels.
+    - hub_layout (str): How hub nodes are drawn ('bus', 'stub', or 'none' to lay them out like any other node).
+    - hub_threshold (int): Nodes with at least this many distinct neighbours are treated as hubs (0 disables it).
+    - layout_from (str, optional): Path to a layout file written by save_layout_file, used instead of computing the layout.
+    - save_layout_file (str, optional): Path where the computed levels and positions are written as JSON.
+    - groups (str): Draw the nodes of each containerlab group in a container, 'expanded' or 'collapsed' ('none' draws them flat).
+    - routing (str): 'orthogonal' to compute the waypoints of the links, or 'none' to leave routing them to draw.io.
+    """
+
+    containerlab_data = load_topology_file(input_file)
+
+    saved_layout = load_layout(layout_from) if layout_from else None
+
+    styles = load_styles_from_config(theme_path(theme))
+    diagram, layout_data = build_diagram(containerlab_data, styles, include_unlinked_nodes=include_unlinked_nodes, no_links=no_links, layout=layout, verbose=verbose, seed=seed, iterations=iterations, time_budget=time_budget, convergence_threshold=convergence_threshold, hub_layout=hub_layout, hub_threshold=hub_threshold, saved_layout=saved_layout, groups=groups, routing=routing)
+
+    if save_layout_file:
+        save_layout(layout_data, save_layout_file)
+        print("Saved layout to:", save_layout_file)
 
     # If output_file is not provided, generate it from input_file
     if not output_file:
@@ -615,26 +1625,39 @@ def main(input_file, output_file, theme, include_unlinked_nodes=False, no_links=
     output_filename = os.path.basename(output_file)
     os.makedirs(output_folder, exist_ok=True)
 
-    diagram.dump_file(filename=output_filename, folder=output_folder)
+    if os.path.splitext(output_filename)[1].lower() == '.svg':
+        # Render a preview directly instead of a draw.io file
+        with open(output_file, 'w') as file:
+            write_svg(diagram, file)
+    else:
+        diagram.dump_file(filename=output_filename, folder=output_folder)
 
     print("Saved file to:", output_file)
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Generate a topology diagram from a containerlab YAML or draw.io XML file.')
-    parser.add_argument('-i', '--input', required=True, help='The filename of the input file (containerlab YAML for diagram generation).')
-    parser.add_argument('-o', '--output', required=False, help='The output file path for the generated diagram (draw.io format).')
+    parser.add_argument('-i', '--input', required=True, help='The filename of the input file (containerlab YAML, or the topology-data.json of a deployed lab, for diagram generation).')
+    parser.add_argument('-o', '--output', required=False, help='The output file path for the generated diagram (draw.io format, or an SVG preview if it ends with .svg).')
     parser.add_argument('--include-unlinked-nodes', action='store_true', help='Include nodes without any links in the topology diagram')
     parser.add_argument('--no-links', action='store_true', help='Do not draw links between nodes in the topology diagram')
-    parser.add_argument('--layout', type=str, default='vertical', choices=['vertical', 'horizontal'], help='Specify the layout of the topology diagram (vertical or horizontal)')
+    parser.add_argument('--layout', type=str, default='vertical', choices=OPTION_CHOICES['layout'], help='Specify the layout of the topology diagram (vertical, horizontal or force)')
     parser.add_argument('--theme', default='bright', help='Specify the theme for the diagram (bright, dark) or the path to a custom style config file.')  
     parser.add_argument('--verbose', action='store_true', help='Enable verbose output for debugging purposes')  
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the initial placement of the force layout')
+    parser.add_argument('--iterations', type=int, default=300, help='Maximum number of iterations of the force layout')
+    parser.add_argument('--time-budget', type=float, default=None, help='Maximum time in seconds spent in the force layout')
+    parser.add_argument('--convergence-threshold', type=float, default=0.5, help='Stop the force layout once no node moves more than this many pixels per iteration')
+    parser.add_argument('--hub-layout', type=str, default='bus', choices=OPTION_CHOICES['hub_layout'], help='Draw hub nodes (bridges, high-degree nodes) as a bus bar, as a stub next to each neighbour, or as regular nodes (none)')
+    parser.add_argument('--hub-threshold', type=int, default=0, help='Treat nodes with at least this many distinct neighbours as hubs (0 disables it, bridges are always hubs)')
+    parser.add_argument('--groups', type=str, default='none', choices=OPTION_CHOICES['groups'], help='Draw the nodes of each containerlab group inside a container, laying out every group on its own (expanded or collapsed), or ignore groups (none)')
+    parser.add_argument('--save-layout', dest='save_layout', default=None, help='Write the computed levels and positions of the nodes to this JSON file')
+    parser.add_argument('--layout-from', dest='layout_from', default=None, help='Skip the layout step and use the levels and positions from a JSON file written by --save-layout')
+    parser.add_argument('--routing', type=str, default='none', choices=OPTION_CHOICES['routing'], help='Compute orthogonal waypoints for the links, with parallel links on separate tracks (orthogonal), or leave routing them to draw.io (none)')
     return parser.parse_args()
     
 if __name__ == "__main__":
     args = parse_arguments()
 
-    script_dir = os.path.dirname(__file__)
-
-    main(args.input, args.output, args.theme, args.include_unlinked_nodes, args.no_links, args.layout, args.verbose)
+    main(args.input, args.output, args.theme, args.include_unlinked_nodes, args.no_links, args.layout, args.verbose, args.seed, args.iterations, args.time_budget, args.convergence_threshold, args.hub_layout, args.hub_threshold, args.layout_from, args.save_layout, args.groups, args.routing)
 
 
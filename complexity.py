@@ -0,0 +1,285 @@
+import argparse
+import copy
+import gc
+import io
+import json
+import math
+import signal
+import sys
+import time
+import xml.etree.ElementTree as ET
+import clab2drawio
+import drawio2clab
+import topology_data
+
+# Growth functions the stages are declared against
+BOUNDS = {
+    'n': lambda n: n,
+    'n log n': lambda n: n * math.log(n),
+}
+
+def generate_topology(node_count):
+    """
+    Generates a three-tier containerlab topology with about node_count nodes: spines, leaves connected to
+    two spines each and clients connected to one leaf, with a few of them dual-homed over two links.
+    Leaves are grouped in pods of ten, with the clients connected to them.
+    """
+    spine_count = max(2, node_count // 50)
+    leaf_count = max(2, node_count // 5)
+    client_count = max(1, node_count - spine_count - leaf_count)
+
+    nodes = {}
+    links = []
+    for i in range(1, spine_count + 1):
+        nodes[f"spine{i}"] = {'kind': 'nokia_srlinux', 'image': 'ghcr.io/nokia/srlinux'}
+    for i in range(1, leaf_count + 1):
+        nodes[f"leaf{i}"] = {'kind': 'nokia_srlinux', 'image': 'ghcr.io/nokia/srlinux', 'group': f"pod{(i - 1) // 10}"}
+        for uplink in range(2):
+            spine = (i + uplink) % spine_count + 1
+            links.append({'endpoints': [f"leaf{i}:e1-{50 + uplink}", f"spine{spine}:e1-{i}"]})
+    for i in range(1, client_count + 1):
+        leaf = i % leaf_count + 1
+        nodes[f"client{i}"] = {'kind': 'linux', 'image': 'alpine', 'mgmt-ipv4': f"172.20.{i // 250}.{i % 250 + 2}", 'group': f"pod{(leaf - 1) // 10}"}
+        links.append({'endpoints': [f"client{i}:eth1", f"leaf{leaf}:e1-{i}"]})
+        if i % 10 == 0:
+            links.append({'endpoints': [f"client{i}:eth2", f"leaf{leaf}:e2-{i}"]})
+
+    return {'name': f"generated{node_count}", 'topology': {'nodes': nodes, 'links': links}}
+
+def generate_meshed_clos(node_count, width=8):
+    """
+    Generates a deep multi-tier Clos with about node_count nodes: tiers of width nodes, each node connected
+    to every node of the next tier.
+    """
+    tiers = max(2, node_count // width)
+    nodes = {f"tier{t}-{i}": {'kind': 'nokia_srlinux'} for t in range(tiers) for i in range(width)}
+    links = [{'endpoints': [f"tier{t}-{i}:e1-{width + j}", f"tier{t + 1}-{j}:e1-{i}"]} for t in range(tiers - 1) for i in range(width) for j in range(width)]
+    return {'name': f"clos{node_count}", 'topology': {'nodes': nodes, 'links': links}}
+
+def generate_chain(node_count):
+    """Generates a chain of node_count nodes, each connected to the next one."""
+    nodes = {f"node{i}": {'kind': 'linux'} for i in range(node_count)}
+    links = [{'endpoints': [f"node{i}:eth1", f"node{i + 1}:eth2"]} for i in range(node_count - 1)]
+    return {'name': f"chain{node_count}", 'topology': {'nodes': nodes, 'links': links}}
+
+def shape_inputs(generate):
+    """Returns an inputs function giving the nodes and links of the topologies generated by generate."""
+    def inputs(node_count):
+        containerlab_data = generate(node_count)
+        return {'nodes': dict(sorted(containerlab_data['topology']['nodes'].items())), 'links': clab2drawio.extract_links(containerlab_data)}
+    return inputs
+
+clos_inputs = shape_inputs(generate_meshed_clos)
+chain_inputs = shape_inputs(generate_chain)
+
+def generate_topology_data(node_count):
+    """
+    Returns the topology-data.json containerlab would write when deploying the generated topology, as a string.
+    """
+    containerlab_data = generate_topology(node_count)
+    name = containerlab_data['name']
+    nodes = {}
+    for index, (node, info) in enumerate(containerlab_data['topology']['nodes'].items()):
+        nodes[node] = {
+            'index': str(index), 'shortname': node, 'longname': f"clab-{name}-{node}", 'fqdn': f"{node}.{name}.io",
+            'group': info.get('group', ''), 'labdir': f"/root/{name}/clab-{name}/{node}", 'kind': info['kind'], 'image': info['image'],
+            'mgmt-ipv4-address': info.get('mgmt-ipv4', ''), 'mgmt-ipv4-prefix-length': 16,
+            'labels': {'clab-node-kind': info['kind'], 'clab-node-name': node, 'clab-node-type': '', 'containerlab': name},
+        }
+    links = []
+    for link in containerlab_data['topology']['links']:
+        (a_node, a_intf), (z_node, z_intf) = (endpoint.split(':') for endpoint in link['endpoints'])
+        links.append({'a': {'node': a_node, 'interface': a_intf, 'mac': '', 'peer': 'z'}, 'z': {'node': z_node, 'interface': z_intf, 'mac': '', 'peer': 'a'}})
+    return json.dumps({'name': name, 'type': 'clab', 'clab': {'config': {'prefix': 'clab'}}, 'ssh-pub-keys': [], 'nodes': nodes, 'links': links}, indent=2)
+
+def topology_data_inputs(node_count):
+    """Returns the input of the topology-data.json reader for a generated topology."""
+    return {'json': generate_topology_data(node_count)}
+
+def clab_inputs(node_count):
+    """Returns the inputs of every clab2drawio stage for a generated topology."""
+    containerlab_data = generate_topology(node_count)
+    nodes = dict(sorted(containerlab_data['topology']['nodes'].items()))
+    links = clab2drawio.extract_links(containerlab_data)
+    sorted_nodes, node_graphlevels, connections = clab2drawio.assign_graphlevels(nodes, links)
+    positions = clab2drawio.calculate_positions(sorted_nodes, links, node_graphlevels, connections)
+    styles = clab2drawio.load_theme('bright')
+    diagram, _ = clab2drawio.build_diagram(containerlab_data, styles)
+    node_groups = {node: info['group'] for node, info in nodes.items() if 'group' in info}
+    grouped_graphlevels, grouped_positions = clab2drawio.compute_grouped_layout(nodes, links, node_groups)
+    return {
+        'containerlab_data': containerlab_data, 'nodes': nodes, 'links': links, 'sorted_nodes': sorted_nodes,
+        'node_graphlevels': node_graphlevels, 'connections': connections, 'positions': positions,
+        'styles': styles, 'diagram': diagram, 'node_groups': node_groups,
+        'grouped_graphlevels': grouped_graphlevels, 'grouped_positions': grouped_positions,
+    }
+
+def drawio_inputs(node_count):
+    """Returns the inputs of every drawio2clab stage for the diagram of a generated topology."""
+    xml_data = clab2drawio.clab_to_drawio(generate_topology(node_count)).encode()
+    root = drawio2clab.find_diagram_root(ET.fromstring(xml_data))
+    node_details = drawio2clab.extract_nodes(root)
+    links_info = drawio2clab.extract_links(root, node_details)
+    drawio2clab.extract_link_labels(root, links_info)
+    aggregated = drawio2clab.aggregate_node_information(copy.deepcopy(node_details))
+    compiled_links = drawio2clab.compile_link_information(links_info)
+    filtered_nodes = drawio2clab.filter_nodes(links_info, aggregated)
+    yaml_data = drawio2clab.generate_yaml_structure(filtered_nodes, compiled_links, 'generated')
+    return {
+        'xml_data': xml_data, 'root': root, 'node_details': node_details, 'links_info': links_info,
+        'aggregated': aggregated, 'compiled_links': compiled_links, 'filtered_nodes': filtered_nodes, 'yaml_data': yaml_data,
+    }
+
+def add_nodes_and_links(inputs):
+    base_style, link_style, src_label_style, trgt_label_style, custom_styles, node_classifier, bus_style, group_style = inputs['styles']
+    diagram = clab2drawio.new_diagram("Network Topology")
+    return lambda: clab2drawio.add_nodes_and_links(diagram, inputs['nodes'], inputs['positions'], inputs['links'], inputs['node_graphlevels'], base_style=base_style, link_style=link_style, custom_styles=custom_styles, node_classifier=node_classifier, src_label_style=src_label_style, trgt_label_style=trgt_label_style)
+
+def add_groups(inputs):
+    diagram = clab2drawio.new_diagram("Network Topology")
+    return lambda: clab2drawio.add_groups(diagram, inputs['node_groups'], inputs['grouped_positions'])
+
+def place_in_groups(inputs):
+    base_style, link_style, src_label_style, trgt_label_style, custom_styles, node_classifier, bus_style, group_style = inputs['styles']
+    diagram = clab2drawio.new_diagram("Network Topology")
+    containers = clab2drawio.add_groups(diagram, inputs['node_groups'], inputs['grouped_positions'], group_style=group_style)
+    clab2drawio.add_nodes_and_links(diagram, inputs['nodes'], inputs['grouped_positions'], inputs['links'], inputs['grouped_graphlevels'], base_style=base_style, link_style=link_style, custom_styles=custom_styles, node_classifier=node_classifier, src_label_style=src_label_style, trgt_label_style=trgt_label_style)
+    return lambda: clab2drawio.place_in_groups(diagram, inputs['node_groups'], containers)
+
+def route_links(inputs):
+    diagram, _ = clab2drawio.build_diagram(inputs['containerlab_data'], inputs['styles'])
+    return lambda: clab2drawio.route_links(diagram, inputs['positions'])
+
+def extract_link_labels(inputs):
+    links_info = drawio2clab.extract_links(inputs['root'], inputs['node_details'])
+    return lambda: drawio2clab.extract_link_labels(inputs['root'], links_info)
+
+# (script, stage, declared bound, inputs, setup) where setup returns the call to time.
+# Setup runs before every measurement, so stages that modify their inputs always start from the same state.
+STAGES = [
+    ('topology_data', 'read_topology_data', 'n', topology_data_inputs, lambda i: lambda: topology_data.read_topology_data(io.StringIO(i['json']))),
+    ('clab2drawio', 'extract_links', 'n', clab_inputs, lambda i: lambda: clab2drawio.extract_links(i['containerlab_data'])),
+    ('clab2drawio', 'detect_hubs', 'n', clab_inputs, lambda i: lambda: clab2drawio.detect_hubs(i['nodes'], i['links'], degree_threshold=50)),
+    ('clab2drawio', 'assign_graphlevels', 'n log n', clab_inputs, lambda i: lambda: clab2drawio.assign_graphlevels(i['nodes'], i['links'])),
+    ('clab2drawio', 'calculate_positions', 'n log n', clab_inputs, lambda i: lambda: clab2drawio.calculate_positions(list(i['sorted_nodes']), i['links'], i['node_graphlevels'], copy.deepcopy(i['connections']))),
+    ('clab2drawio', 'assign_graphlevels[clos]', 'n log n', clos_inputs, lambda i: lambda: clab2drawio.assign_graphlevels(i['nodes'], i['links'])),
+    ('clab2drawio', 'assign_graphlevels[chain]', 'n log n', chain_inputs, lambda i: lambda: clab2drawio.assign_graphlevels(i['nodes'], i['links'])),
+    ('clab2drawio', 'compute_layout[clos]', 'n log n', clos_inputs, lambda i: lambda: clab2drawio.compute_layout(i['nodes'], i['links'])),
+    ('clab2drawio', 'compute_layout[chain]', 'n log n', chain_inputs, lambda i: lambda: clab2drawio.compute_layout(i['nodes'], i['links'])),
+    ('clab2drawio', 'force_directed_layout', 'n log n', clab_inputs, lambda i: lambda: clab2drawio.force_directed_layout(i['nodes'], i['links'], seed_positions=i['positions'], iterations=5, tolerance=0)),
+    ('clab2drawio', 'compute_grouped_layout', 'n log n', clab_inputs, lambda i: lambda: clab2drawio.compute_grouped_layout(i['nodes'], i['links'], i['node_groups'])),
+    ('clab2drawio', 'add_nodes_and_links', 'n', clab_inputs, add_nodes_and_links),
+    ('clab2drawio', 'add_groups', 'n', clab_inputs, add_groups),
+    ('clab2drawio', 'place_in_groups', 'n', clab_inputs, place_in_groups),
+    ('clab2drawio', 'route_links', 'n log n', clab_inputs, route_links),
+    ('clab2drawio', 'dump_xml', 'n', clab_inputs, lambda i: i['diagram'].dump_xml),
+    ('clab2drawio', 'write_svg', 'n', clab_inputs, lambda i: lambda: clab2drawio.write_svg(i['diagram'], io.StringIO())),
+    ('drawio2clab', 'parse', 'n', drawio_inputs, lambda i: lambda: drawio2clab.find_diagram_root(ET.fromstring(i['xml_data']))),
+    ('drawio2clab', 'extract_nodes', 'n', drawio_inputs, lambda i: lambda: drawio2clab.extract_nodes(i['root'])),
+    ('drawio2clab', 'extract_links', 'n', drawio_inputs, lambda i: lambda: drawio2clab.extract_links(i['root'], i['node_details'])),
+    ('drawio2clab', 'extract_link_labels', 'n', drawio_inputs, extract_link_labels),
+    ('drawio2clab', 'aggregate_node_information', 'n', drawio_inputs, lambda i: (lambda details: lambda: drawio2clab.aggregate_node_information(details))(copy.deepcopy(i['node_details']))),
+    ('drawio2clab', 'compile_link_information', 'n log n', drawio_inputs, lambda i: lambda: drawio2clab.compile_link_information(i['links_info'])),
+    ('drawio2clab', 'filter_nodes', 'n', drawio_inputs, lambda i: lambda: drawio2clab.filter_nodes(i['links_info'], i['aggregated'])),
+    ('drawio2clab', 'generate_yaml_structure', 'n log n', drawio_inputs, lambda i: lambda: drawio2clab.generate_yaml_structure(i['filtered_nodes'], i['compiled_links'], 'generated')),
+    ('drawio2clab', 'dump_yaml', 'n', drawio_inputs, lambda i: lambda: drawio2clab.dump_yaml(i['yaml_data'])),
+]
+
+class StageTimeout(Exception):
+    pass
+
+def raise_timeout(signum, frame):
+    raise StageTimeout()
+
+def measure(setup, inputs, repeat, time_limit=None):
+    """
+    Returns the fastest of repeat runs of a stage, in seconds.
+    A run taking longer than time_limit seconds is interrupted with StageTimeout.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        call = setup(inputs)
+        # Like timeit, keep the garbage collector from adding pauses that depend on the heap size
+        gc.collect()
+        gc.disable()
+        previous_handler = signal.signal(signal.SIGALRM, raise_timeout)
+        try:
+            if time_limit:
+                signal.setitimer(signal.ITIMER_REAL, time_limit)
+            start = time.perf_counter()
+            call()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+            gc.enable()
+    return best
+
+def growth_exponent(sizes, timings, bound):
+    """
+    Fits timing = c * bound(n) * n^k by least squares on a log-log scale and returns k,
+    the growth beyond the declared bound (0 for a stage that scales exactly as declared).
+    """
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(max(t, 1e-9) / BOUNDS[bound](n)) for n, t in zip(sizes, timings)]
+    x_mean, y_mean = sum(xs) / len(xs), sum(ys) / len(ys)
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / sum((x - x_mean) ** 2 for x in xs)
+
+def main(sizes, repeat=3, tolerance=0.3, stage_filter=None, time_limit=30):
+    """
+    Times every stage on generated topologies of the given sizes and checks that it does not grow faster
+    than its declared bound. A stage that runs longer than time_limit seconds on one size, or runs out of
+    recursion depth, fails and is not run on the larger sizes.
+    Returns the exit status: 0 if every stage is within its bound, 1 otherwise.
+    """
+    stages = [stage for stage in STAGES if not stage_filter or stage_filter in f"{stage[0]}.{stage[1]}"]
+    timings = {stage[:2]: [] for stage in stages}
+    errors = {}
+
+    for node_count in sizes:
+        inputs = {}
+        for script, name, bound, make_inputs, setup in stages:
+            if (script, name) in errors:
+                continue
+            if make_inputs not in inputs:
+                inputs[make_inputs] = make_inputs(node_count)
+            try:
+                timings[(script, name)].append(measure(setup, inputs[make_inputs], repeat, time_limit))
+            except StageTimeout:
+                errors[(script, name)] = f"took more than {time_limit}s on {node_count} nodes"
+            except RecursionError:
+                errors[(script, name)] = f"RecursionError on {node_count} nodes"
+
+    failures = 0
+    print(f"{'stage':<44} {'bound':<8} " + " ".join(f"{n:>9}" for n in sizes) + "   excess")
+    for script, name, bound, _, _ in stages:
+        stage_timings = timings[(script, name)]
+        measured = " ".join(f"{t * 1000:>7.1f}ms" for t in stage_timings) + " ".join([""] + [f"{'-':>9}"] * (len(sizes) - len(stage_timings)))
+        if (script, name) in errors:
+            failures += 1
+            print(f"{script + '.' + name:<44} {bound:<8} {measured}   FAIL ({errors[(script, name)]})")
+            continue
+        excess = growth_exponent(sizes, stage_timings, bound)
+        status = "ok" if excess <= tolerance else "FAIL"
+        failures += status == "FAIL"
+        print(f"{script + '.' + name:<44} {bound:<8} {measured}   {excess:+.2f} {status}")
+
+    if failures:
+        print(f"{failures} stage(s) grow faster than their declared bound (tolerance {tolerance:+.2f})")
+        return 1
+    print("All stages are within their declared bounds")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that every stage of clab2drawio and drawio2clab scales within its declared complexity bound, using generated topologies of increasing size.")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[100, 300, 1000, 3000, 10000], help="Number of nodes of the generated topologies. Default is 100 300 1000 3000 10000.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs per stage and size, the fastest one is used. Default is 3.")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Largest accepted growth exponent beyond the declared bound. Default is 0.3.")
+    parser.add_argument("--stage", dest="stage_filter", default=None, help="Only check the stages whose 'script.stage' name contains this string.")
+    parser.add_argument("--time-limit", type=float, default=30, help="Fail a stage that runs longer than this many seconds on one size. Default is 30.")
+
+    args = parser.parse_args()
+
+    if len(args.sizes) < 2:
+        parser.error("at least two sizes are needed to fit the growth curve")
+    sys.exit(main(sorted(args.sizes), args.repeat, args.tolerance, args.stage_filter, args.time_limit))
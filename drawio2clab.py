@@ -4,19 +4,71 @@ from xml.etree.ElementTree import ParseError
 import yaml
 import re
 import os
+import sys
+from node_rules import NodeClassifier
+from natural_order import natural_key
 
-def report_error(message):
-    """Prints an error message to the console."""
-    print(f"Error: {message}")
-
-def parse_xml(file_path, diagram_name=None):
+class Node:
+    """
+    A node of the diagram. Attributes that are not set in the diagram are None.
+    get() accepts the containerlab attribute names, e.g. 'mgmt-ipv4'.
+    """
+    __slots__ = ('label', 'kind', 'type', 'mgmt_ipv4', 'group', 'labels')
+
+    def __init__(self, label, kind, type=None, mgmt_ipv4=None, group=None, labels=None):
+        self.label = label
+        self.kind = kind
+        self.type = type
+        self.mgmt_ipv4 = mgmt_ipv4
+        self.group = group
+        self.labels = labels
+
+    def get(self, attribute, default=None):
+        value = getattr(self, attribute.replace('-', '_'), None)
+        return default if value is None else value
+
+class Link:
+    """A link of the diagram between the labels of two nodes, with its interface labels."""
+    __slots__ = ('id', 'source', 'target', 'x', 'y', 'labels')
+
+    def __init__(self, id, source, target, x=None, y=None):
+        self.id = id
+        self.source = source
+        self.target = target
+        self.x = x
+        self.y = y
+        self.labels = []
+
+class LinkLabel:
+    """An interface label placed on a link."""
+    __slots__ = ('value', 'x_position', 'y_position')
+
+    def __init__(self, value, x_position, y_position):
+        self.value = value
+        self.x_position = x_position
+        self.y_position = y_position
+
+def report_error(message, errors=None):
+    """Prints an error message to the console, or collects it in errors if a list is given."""
+    if errors is not None:
+        errors.append(message)
+    else:
+        print(f"Error: {message}")
+
+def parse_xml(file_path, diagram_name=None, errors=None):
     """
     Parses an XML file and returns the mxGraphModel/root element for the specified diagram name.
     If no diagram name is specified or the specified diagram is not found, defaults to the first diagram.
+    Errors are reported as in find_diagram_root.
     """
     tree = ET.parse(file_path)
-    root = tree.getroot()
+    return find_diagram_root(tree.getroot(), diagram_name, errors)
 
+def find_diagram_root(root, diagram_name=None, errors=None):
+    """
+    Returns the mxGraphModel/root element of the diagram with the given name in a parsed .drawio document,
+    or of the first diagram if no name is specified. Returns None if it cannot be found.
+    """
     # If a diagram name is specified, try to find the diagram by name
     if diagram_name:
         for diagram in root.findall('diagram'):
@@ -26,9 +78,9 @@ def parse_xml(file_path, diagram_name=None):
                 if mxGraphModel_root is not None:
                     return mxGraphModel_root
                 else:
-                    print(f"mxGraphModel/root not found in diagram '{diagram_name}'.")
+                    report_error(f"mxGraphModel/root not found in diagram '{diagram_name}'.", errors)
                     return None
-        print(f"Diagram named '{diagram_name}' not found.")
+        report_error(f"Diagram named '{diagram_name}' not found.", errors)
         return None
 
     # Default to the first diagram if no name is specified
@@ -38,23 +90,47 @@ def parse_xml(file_path, diagram_name=None):
         if mxGraphModel_root is not None:
             return mxGraphModel_root
         else:
-            print("mxGraphModel/root not found in the first diagram.")
+            report_error("mxGraphModel/root not found in the first diagram.", errors)
             return None
 
-    print("No diagrams found in the file.")
+    report_error("No diagrams found in the file.", errors)
     return None
 
+def is_container(style):
+    """Returns True if a draw.io style is the style of a container, such as the group containers of clab2drawio."""
+    return 'swimlane' in style or 'container=1' in style
+
+def extract_containers(mxGraphModel):
+    """
+    Returns a dictionary of the IDs of the container cells (swimlanes and other containers) to their labels.
+    """
+    containers = {}
+    for obj in mxGraphModel.findall(".//object"):
+        mxCell = obj.find('mxCell')
+        if mxCell is not None and is_container(mxCell.get('style', '')):
+            containers[obj.get('id')] = obj.get('label', '').strip()
+    for mxCell in mxGraphModel.findall(".//mxCell[@vertex='1'][@id]"):
+        if is_container(mxCell.get('style', '')):
+            containers[mxCell.get('id')] = mxCell.get('value', '').strip()
+    return containers
+
 def extract_nodes(mxGraphModel):
     """
     Extracts and returns node names and their IDs from the mxGraphModel.
     Handles both standalone mxCell elements with their own IDs and
     object elements with embedded mxCell, using the object's ID.
+    Nodes placed in a container without a 'group' attribute get the label of the container as their group.
+    Returns a dictionary of cell ID to Node. Labels are interned, as every link refers to them.
     """
     node_details = {}
+    node_kind = 'nokia_srlinux'
+    containers = extract_containers(mxGraphModel)
     
     # Process all objects which might contain nodes or represent nodes directly
     for obj in mxGraphModel.findall(".//object"):
         node_id = obj.get('id')
+        if node_id in containers:
+            continue
         node_label = obj.get('label', '').strip()
         node_type = obj.get('type', None)  # Capture the 'type' attribute
         mgmt_ipv4 = obj.get('mgmt-ipv4', None)
@@ -69,16 +145,15 @@ def extract_nodes(mxGraphModel):
                 continue
             if mxCell is not None:
                 node_label = mxCell.get('value', '').strip()
+        # Nodes drawn in a container belong to its group
+        if group is None:
+            parent_cell = obj.find('mxCell')
+            if parent_cell is not None and parent_cell.get('parent') in containers:
+                group = containers[parent_cell.get('parent')] or None
+
         # Add to node_details if a label was found
         if node_label:
-            node_details[node_id] = {
-                'label': node_label, 
-                'type': node_type,
-                'mgmt-ipv4': mgmt_ipv4,
-                'group': group,
-                'labels': labels,
-                'kind': node_kind
-            }
+            node_details[node_id] = Node(sys.intern(node_label), node_kind, type=node_type, mgmt_ipv4=mgmt_ipv4, group=group, labels=labels)
 
     # Process all mxCell elements that have vertex='1'
     for mxCell in mxGraphModel.findall(".//mxCell[@vertex='1']"):
@@ -90,10 +165,7 @@ def extract_nodes(mxGraphModel):
             if not "image=data" in style:
                 continue
             if node_label:
-                node_details[node_id] = {
-                    'label': node_label,
-                    'kind': node_kind
-                }
+                node_details[node_id] = Node(sys.intern(node_label), node_kind)
 
     return node_details
 
@@ -102,6 +174,7 @@ def extract_links(mxGraphModel, node_details):
     """
     Extracts link information from the mxGraphModel, including source, target,
     and any geometric data. Links are represented by mxCell elements with a source and target.
+    Returns a dictionary of link ID to Link.
     """
     links_info = {}
     if mxGraphModel:
@@ -109,7 +182,7 @@ def extract_links(mxGraphModel, node_details):
         for mxCell in mxGraphModel.findall(".//mxCell[@source][@target][@edge]"):
             link_info = extract_link_info(mxCell, node_details)
             if link_info:
-                links_info[link_info['id']] = link_info
+                links_info[link_info.id] = link_info
 
         # Process links defined within objects
         for object_elem in mxGraphModel.findall(".//object"):
@@ -119,7 +192,7 @@ def extract_links(mxGraphModel, node_details):
                 object_id = object_elem.get('id')
                 link_info = extract_link_info(mxCell, node_details, fallback_id=object_id)
                 if link_info:
-                    links_info[link_info['id']] = link_info
+                    links_info[link_info.id] = link_info
 
     return links_info
 
@@ -134,17 +207,11 @@ def extract_link_info(mxCell, node_details, fallback_id=None):
     x, y = (float(geometry.get(coord, 0)) for coord in ('x', 'y')) if geometry is not None else (None, None)
 
     # Adjusted to access 'label' from node_details
-    source_label = node_details.get(source_id, {}).get('label', "Unknown")
-    target_label = node_details.get(target_id, {}).get('label', "Unknown")
+    source_label = node_details[source_id].label if source_id in node_details else "Unknown"
+    target_label = node_details[target_id].label if target_id in node_details else "Unknown"
 
     if link_id:
-        return {
-            'id': link_id,
-            'source': source_label,
-            'target': target_label,
-            'geometry': {'x': x, 'y': y},
-            'labels': []
-        }
+        return Link(link_id, source_label, target_label, x, y)
 
 def extract_link_labels(mxGraphModel, links_info):
     """
@@ -157,37 +224,31 @@ def extract_link_labels(mxGraphModel, links_info):
             label_value, geometry = mxCell.get('value'), mxCell.find("mxGeometry")
             if label_value and geometry is not None:
                 x_position, y_position = float(geometry.get('x', 0)), float(geometry.get('y', 0))
-                links_info[parent_id]['labels'].append({
-                    'value': label_value,
-                    'x_position': x_position,
-                    'y_position': y_position
-                })
+                links_info[parent_id].labels.append(LinkLabel(sys.intern(label_value), x_position, y_position))
 
-def aggregate_node_information(node_details):
+def aggregate_node_information(node_details, node_classifier=None):
     """
     Aggregates node information by potentially modifying the 'kind' for each node based on specific criteria.
-    If a 'kind' is explicitly provided, it is respected. If not, the function assigns 'linux' to nodes
-    with 'client' in their label, maintaining other kinds as defined or defaulting to 'nokia_srlinux'.
+    If a 'kind' is explicitly provided, it is respected. If not, the kind comes from the node classification
+    rules (by default 'linux' for nodes with 'client' in their label), maintaining other kinds as defined
+    or defaulting to 'nokia_srlinux'.
+    The nodes are updated in place; node_details is returned for convenience.
     """
-    updated_node_details = {}
-    for node_id, details in node_details.items():
+    node_classifier = node_classifier or NodeClassifier()
+    for details in node_details.values():
         # Use the existing 'kind' if it's explicitly defined and not default 'nokia_srlinux', or
-        # apply custom logic to determine 'kind'.
-        if details.get('kind') and details.get('kind') != 'nokia_srlinux':
+        # apply the classification rules to determine 'kind'.
+        if details.kind and details.kind != 'nokia_srlinux':
             # 'kind' is explicitly provided, so we keep it.
-            node_kind = details['kind']
-        else:
-            # Apply custom logic: if 'client' in label, set as 'linux'; otherwise, keep existing or default to 'nokia_srlinux'.
-            node_kind = 'linux' if 'client' in details['label'] else details.get('kind', 'nokia_srlinux')
-        
-        # Update node details with potentially modified 'kind'.
-        updated_details = details.copy()
-        updated_details['kind'] = node_kind
-        updated_node_details[node_id] = updated_details
+            continue
+
+        # Apply the rules; otherwise, keep existing or default to 'nokia_srlinux'.
+        _, rule_kind = node_classifier.classify(details.label, labels=details.labels)
+        details.kind = rule_kind or details.kind or 'nokia_srlinux'
 
-    return updated_node_details
+    return node_details
 
-def compile_link_information(links_info, style='block'):
+def compile_link_information(links_info, style='block', errors=None):
     """
     Compiles and formats link information into a structured format. 
     When there are three or more labels on a link, only the labels closest to the source and destination are considered.
@@ -195,29 +256,29 @@ def compile_link_information(links_info, style='block'):
     """
     compiled_links = []
     for link_id, info in links_info.items():
-        sorted_labels = sorted(info['labels'], key=lambda label: label['x_position'])
+        sorted_labels = sorted(info.labels, key=lambda label: label.x_position)
         
         # Handle insufficient labels gracefully
         if len(sorted_labels) < 2:
-            report_error(f"Not enough labels for link {link_id}. At least 2 labels are required.")
+            report_error(f"Not enough labels for link {link_id}. At least 2 labels are required.", errors)
             continue  # Skip this link
 
-        source_label = sorted_labels[0]['value']
-        target_label = sorted_labels[-1]['value']
+        source_label = sorted_labels[0].value
+        target_label = sorted_labels[-1].value
         
         if style == 'block':
-            endpoints = [f"{info['source']}:{source_label}", f"{info['target']}:{target_label}"]
+            endpoints = [f"{info.source}:{source_label}", f"{info.target}:{target_label}"]
         elif style == 'flow':
             # For flow style, prepare endpoints in a list first for consistent sorting
-            endpoints_list = [f"{info['source']}:{source_label}", f"{info['target']}:{target_label}"]
+            endpoints_list = [f"{info.source}:{source_label}", f"{info.target}:{target_label}"]
             # Ensure consistent sorting for flow style before converting to string
-            endpoints_list.sort(key=lambda x: x.split(':')[0])
+            endpoints_list.sort(key=lambda x: natural_key(x.split(':')[0]))
             endpoints = f"[\"{endpoints_list[0]}\", \"{endpoints_list[1]}\"]"
             
         compiled_links.append({'endpoints': endpoints})
 
-    # Sort the compiled_links list by the source of the endpoint
-    compiled_links.sort(key=lambda x: (x['endpoints'][0].split(':')[0] if style == 'block' else x['endpoints']))
+    # Sort the compiled_links list by their endpoints, so the output does not depend on the order of the cells
+    compiled_links.sort(key=lambda x: (tuple(natural_key(endpoint) for endpoint in x['endpoints']) if style == 'block' else natural_key(x['endpoints'])))
 
     return compiled_links
 
@@ -226,14 +287,16 @@ def filter_nodes(links_info, node_details):
     """
     Filters nodes to include only those nodes involved in the links, based on their labels.
     This helps to eliminate any nodes that are not part of the actual topology being described.
+    The other nodes are removed from node_details in place; node_details is returned for convenience.
     """
     # Collect labels of nodes involved in links
-    involved_labels = {info['source'] for info in links_info.values()} | {info['target'] for info in links_info.values()}
+    involved_labels = {info.source for info in links_info.values()} | {info.target for info in links_info.values()}
 
-    # Filter node_details to include only those nodes with labels involved in links
-    filtered_details = {node_id: details for node_id, details in node_details.items() if details['label'] in involved_labels}
+    # Remove the nodes whose labels are not involved in links
+    for node_id in [node_id for node_id, details in node_details.items() if details.label not in involved_labels]:
+        del node_details[node_id]
 
-    return filtered_details
+    return node_details
 
 def generate_yaml_structure(filtered_node_details, compiled_links, input_file):
     """
@@ -245,9 +308,10 @@ def generate_yaml_structure(filtered_node_details, compiled_links, input_file):
     nodes = {}
     kinds = {}
 
-    for node_id, details in filtered_node_details.items():
-        node_label = details['label']
-        node_kind = details['kind']
+    # Nodes in canonical order, so the output does not depend on the order of the cells
+    for details in sorted(filtered_node_details.values(), key=lambda details: natural_key(details.label)):
+        node_label = details.label
+        node_kind = details.kind
 
         # Dynamically construct the kinds dictionary with default settings for known kinds
         if node_kind not in kinds:
@@ -257,8 +321,8 @@ def generate_yaml_structure(filtered_node_details, compiled_links, input_file):
 
         # Prepare node information, conditionally including 'type' if it exists and is not None
         node_info = {'kind': node_kind}
-        if details.get('type'):
-            node_info['type'] = details['type']
+        if details.type:
+            node_info['type'] = details.type
 
         # Optionally add other details if they exist and are not None
         for attr in ['mgmt-ipv4', 'group', 'labels']:
@@ -272,7 +336,7 @@ def generate_yaml_structure(filtered_node_details, compiled_links, input_file):
     return {
         'name': base_name,
         'topology': {
-            'kinds': kinds,
+            'kinds': dict(sorted(kinds.items())),
             'nodes': nodes,
             'links': compiled_links
         }
@@ -288,14 +352,10 @@ def write_yaml_file(yaml_data, file_name, style='block'):
     print(f"YAML file generated successfully at {file_name}.")
 
 
-def post_process_yaml_file_for_flow_style(file_name):
+def apply_flow_style(content):
     """
-    Post-processes the YAML file to ensure 'endpoints' within 'links' are in flow style without single quotes.
+    Rewrites dumped YAML content so 'endpoints' within 'links' are in flow style without single quotes.
     """
-    # Read the original YAML content
-    with open(file_name, 'r') as file:
-        content = file.read()
-
     # Regular expression to match 'endpoints' lines with single-quoted flow-style lists
     # Note the use of triple quotes to allow for internal single and double quotes without needing to escape them
     pattern = re.compile(r"""- endpoints: '\["([^"]+)", "([^"]+)"\]'""")
@@ -308,14 +368,78 @@ def post_process_yaml_file_for_flow_style(file_name):
         return f'  - endpoints: ["{endpoint1}", "{endpoint2}"]'
 
     # Replace the matched patterns with unquoted flow-style lists
-    new_content = pattern.sub(replace_with_unquoted_flow_style, content)
+    return pattern.sub(replace_with_unquoted_flow_style, content)
+
+def post_process_yaml_file_for_flow_style(file_name):
+    """
+    Post-processes the YAML file to ensure 'endpoints' within 'links' are in flow style without single quotes.
+    """
+    # Read the original YAML content
+    with open(file_name, 'r') as file:
+        content = file.read()
+
+    new_content = apply_flow_style(content)
 
     # Write the modified content back to the file
     with open(file_name, 'w') as file:
         file.write(new_content)
-        
 
-def main(input_file, output_file, style='block', diagram_name=None):
+def dump_yaml(yaml_data, style='block'):
+    """
+    Returns the generated YAML structure as a string, formatted like the files written by main.
+    """
+    content = yaml.dump(yaml_data, default_flow_style=False, sort_keys=False)
+    return apply_flow_style(content) if style == 'flow' else content
+
+def load_node_rules(rules_file):
+    """
+    Loads the node classification rules ('node_rules') from a YAML file, such as a clab2drawio theme.
+    Falls back to the built-in rules when the file defines none.
+    """
+    with open(rules_file, 'r') as file:
+        config = yaml.safe_load(file) or {}
+    return NodeClassifier(rules=config.get('node_rules'))
+
+def drawio_to_clab(xml_data, options=None):
+    """
+    Converts the content of a .drawio file (bytes or str) to a containerlab topology dictionary.
+
+    Nothing is read, written or printed, so it can be called concurrently from several threads.
+
+    options is an optional dictionary with any of the keys:
+    - name (str): Name of the topology, 'topology' by default.
+    - style (str): 'block' (default) or 'flow' style for the link endpoints; use dump_yaml to serialise 'flow'.
+    - diagram_name (str): Name of the diagram (tab) to convert, the first one by default.
+    - node_rules (list): Node classification rules used to infer the kind of nodes drawn without one.
+    - errors (list): If given, links that cannot be converted are reported in this list.
+
+    Raises ValueError if the diagram cannot be found.
+    """
+    options = dict(options or {})
+    name = options.pop('name', 'topology')
+    style = options.pop('style', 'block')
+    diagram_name = options.pop('diagram_name', None)
+    node_rules = options.pop('node_rules', None)
+    errors = options.pop('errors', None)
+    if options:
+        raise ValueError(f"Unknown option(s): {', '.join(sorted(options))}")
+    if style not in ('block', 'flow'):
+        raise ValueError(f"Unknown style '{style}', expected 'block' or 'flow'")
+
+    diagram_errors = []
+    root = find_diagram_root(ET.fromstring(xml_data), diagram_name, diagram_errors)
+    if root is None:
+        raise ValueError(diagram_errors[-1])
+
+    node_details = extract_nodes(root)
+    links_info = extract_links(root, node_details)
+    extract_link_labels(root, links_info)
+    node_details = aggregate_node_information(node_details, NodeClassifier(rules=node_rules))
+    compiled_links = compile_link_information(links_info, style, errors if errors is not None else [])
+    filtered_nodes = filter_nodes(links_info, node_details)
+    return generate_yaml_structure(filtered_nodes, compiled_links, name)
+
+def main(input_file, output_file, style='block', diagram_name=None, rules_file=None):
     """
     The main function orchestrates the parsing, extraction, and processing of .drawio XML content,
     and then generates and writes the YAML file. It ties together all the steps necessary to convert
@@ -332,11 +456,12 @@ def main(input_file, output_file, style='block', diagram_name=None):
     # Debug print for links info with label geometry
     print("Links Info with Label Geometry:")
     for link_id, info in links_info.items():
-        labels_str = "; ".join([f"{label['value']} (x: {label['x_position']}, y: {label['y_position']})" for label in info.get('labels', [])])
-        print(f"Link ID: {link_id}, Source: {info['source']}, Target: {info['target']}, Labels: {labels_str}")
+        labels_str = "; ".join([f"{label.value} (x: {label.x_position}, y: {label.y_position})" for label in info.labels])
+        print(f"Link ID: {link_id}, Source: {info.source}, Target: {info.target}, Labels: {labels_str}")
 
 
-    node_details = aggregate_node_information(node_details)
+    node_classifier = load_node_rules(rules_file) if rules_file else None
+    node_details = aggregate_node_information(node_details, node_classifier)
     compiled_links = compile_link_information(links_info, style)
     filtered_nodes = filter_nodes(links_info, node_details)
     yaml_data = generate_yaml_structure(filtered_nodes, compiled_links, input_file)
@@ -350,7 +475,8 @@ if __name__ == "__main__":
     parser.add_argument("-o", "--output", dest="output_file", required=False, help="The output YAML file.")
     parser.add_argument("--style", dest="style", choices=['block', 'flow'], default="block", help="The style for YAML endpoints. Choose 'block' or 'flow'. Default is 'block'.")
     parser.add_argument("--diagram-name", dest="diagram_name", required=False, help="The name of the diagram (tab) to be parsed.")
+    parser.add_argument("--node-rules", dest="rules_file", required=False, help="A YAML file (e.g. a clab2drawio theme) with 'node_rules' used to infer the kind of nodes drawn without one.")
 
     args = parser.parse_args()
 
-    main(args.input_file, args.output_file, args.style, args.diagram_name)
\ No newline at end of file
+    main(args.input_file, args.output_file, args.style, args.diagram_name, args.rules_file)
\ No newline at end of file
@@ -15,12 +15,14 @@ Usage: docker run [DOCKER_OPTIONS] flosch62/clab-io-draw -i INPUT_FILE -o OUTPUT
 This tool automatically converts between .drawio and .yaml file formats for Container Lab diagrams.
 
 Options:
-  -i, --input    Specify the path to the input file. This can be either a .drawio or .yaml/.yml file.
+  -i, --input    Specify the path to the input file. This can be either a .drawio or .yaml/.yml file, or the topology-data.json of a deployed lab.
   -o, --output   Specify the path for the output file. The output format is determined by the input file type.
 
 Examples:
   Convert .drawio to .yaml: docker run -v "\$(pwd)":/data flosch62/clab-io-draw -i input.drawio -o output.yaml
   Convert .yaml to .drawio: docker run -v "\$(pwd)":/data flosch62/clab-io-draw -i input.yaml -o output.drawio
+  Draw a deployed lab:      docker run -v "\$(pwd)":/data flosch62/clab-io-draw -i clab-lab/topology-data.json -o output.drawio
+  Compare two topologies:   docker run -v "\$(pwd)":/data flosch62/clab-io-draw diff old.yaml new.yaml
 EOF
 }
 
@@ -30,6 +32,12 @@ if [ $# -eq 0 ]; then
   exit 1
 fi
 
+# Compare two topologies with topodiff
+if [ "$1" == "diff" ]; then
+  shift
+  exec python -u "/app/topodiff.py" "$@"
+fi
+
 script_name=""
 input_file=""
 prev_arg=""
@@ -51,7 +59,7 @@ fi
 # Determine the script based on file extension
 if [ ! -z "$input_file" ]; then
   case $(get_extension "$input_file") in
-    yml|yaml)
+    yml|yaml|json)
       script_name="clab2drawio.py"
       ;;
     drawio)
@@ -0,0 +1,12 @@
+import re
+
+DIGITS = re.compile(r'(\d+)')
+
+
+def natural_key(name):
+    """
+    Sort key that orders names the way people number them: runs of digits are compared as integers,
+    so leaf2 comes before leaf10. The name itself breaks ties, e.g. between leaf01 and leaf1.
+    """
+    name = str(name)
+    return tuple(int(part) if index % 2 else part for index, part in enumerate(DIGITS.split(name))), name
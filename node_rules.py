@@ -0,0 +1,102 @@
+import re
+
+# Built-in rules, matching the naming conventions both tools have always relied on.
+# 'group' selects the custom style in clab2drawio, 'kind' is the containerlab kind drawio2clab
+# assigns to nodes drawn without one.
+DEFAULT_NODE_RULES = [
+    {'match': {'name': 'client'}, 'group': 'server', 'kind': 'linux'},
+    {'match': {'name': 'leaf'}, 'group': 'leaf'},
+    {'match': {'name': 'spine'}, 'group': 'spine'},
+    {'match': {'name': 'dcgw'}, 'group': 'dcgw'},
+]
+
+MATCH_FIELDS = ('name', 'kind', 'image', 'labels')
+
+
+class NodeClassifier:
+    """
+    Classifies nodes into style groups and kinds using an ordered list of rules. The group comes from the
+    first matching rule that sets a group, the kind from the first matching rule that sets a kind.
+
+    Each rule has a 'match' mapping with regular expressions for any of 'name', 'kind', 'image' and
+    'labels' (a mapping of label name to expression), and the 'group' and/or 'kind' it assigns.
+    Expressions are searched, so a plain word matches anywhere in the value.
+
+    The rules are compiled once. The attribute part of the match (kind, image and the labels used by any
+    rule) is memoised per distinct combination, so classifying many nodes of the same kind and image
+    only costs a dictionary lookup plus the name expressions of the remaining candidate rules.
+    """
+
+    def __init__(self, rules=None, icon_to_group_mapping=None, default_group='default'):
+        self.default_group = default_group
+        self.rules = []
+
+        # 'graph-icon' labels take precedence over every other rule
+        for icon, group in (icon_to_group_mapping or {}).items():
+            self.rules.append(self.compile_rule({'match': {'labels': {'graph-icon': f"^{re.escape(str(icon))}$"}}, 'group': group}))
+        for rule in DEFAULT_NODE_RULES if rules is None else rules:
+            self.rules.append(self.compile_rule(rule))
+
+        self.label_keys = tuple(sorted({key for rule in self.rules for key, _ in rule['labels']}))
+        self.candidates_cache = {}
+
+    @staticmethod
+    def compile_rule(rule):
+        match = rule.get('match') or {}
+        unknown = set(match) - set(MATCH_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown node rule match field(s) {', '.join(sorted(unknown))}, expected {', '.join(MATCH_FIELDS)}")
+
+        def compile_field(field):
+            return re.compile(str(match[field])) if match.get(field) is not None else None
+
+        return {
+            'name': compile_field('name'),
+            'kind': compile_field('kind'),
+            'image': compile_field('image'),
+            'labels': tuple((key, re.compile(str(pattern))) for key, pattern in sorted((match.get('labels') or {}).items())),
+            'group': rule.get('group'),
+            'result_kind': rule.get('kind'),
+        }
+
+    def candidates(self, kind, image, labels):
+        """
+        Returns the rules whose kind, image and label expressions match, in rule order, as
+        (name expression, group, kind) tuples. The list stops at the first rule that always matches and sets both.
+        """
+        labels = labels if isinstance(labels, dict) else {}
+        label_values = tuple(None if labels.get(key) is None else str(labels[key]) for key in self.label_keys)
+        cache_key = (kind, image, label_values)
+        cached = self.candidates_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        relevant_labels = dict(zip(self.label_keys, label_values))
+        candidates = []
+        for rule in self.rules:
+            if rule['kind'] and (kind is None or not rule['kind'].search(str(kind))):
+                continue
+            if rule['image'] and (image is None or not rule['image'].search(str(image))):
+                continue
+            if any(relevant_labels[key] is None or not pattern.search(relevant_labels[key]) for key, pattern in rule['labels']):
+                continue
+            candidates.append((rule['name'], rule['group'], rule['result_kind']))
+            if rule['name'] is None and rule['group'] and rule['result_kind']:
+                break
+
+        cached = self.candidates_cache.setdefault(cache_key, tuple(candidates))
+        return cached
+
+    def classify(self, name, kind=None, image=None, labels=None):
+        """
+        Returns the (group, kind) assigned by the matching rules. The group falls back to the
+        default group and the kind to None when no matching rule sets them.
+        """
+        group = result_kind = None
+        for name_pattern, rule_group, rule_kind in self.candidates(kind, image, labels):
+            if name_pattern is None or name_pattern.search(name):
+                group = group or rule_group
+                result_kind = result_kind or rule_kind
+                if group and result_kind:
+                    break
+        return group or self.default_group, result_kind
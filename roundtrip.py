@@ -0,0 +1,157 @@
+import argparse
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+import clab2drawio
+import drawio2clab
+
+# Kinds and, for some of them, types of the generated nodes
+KINDS = [('nokia_srlinux', 'ixrd3'), ('nokia_srlinux', 'ixrd2l'), ('linux', None), ('ceos', None), ('vr-sros', 'sr-1')]
+
+# Node attributes compared after the round trip
+FIELDS = ('kind', 'type', 'group', 'mgmt-ipv4', 'labels')
+
+# Every kind of mismatch compare_topologies and round_trip report
+MISMATCH_KINDS = ('missing-node', 'unlinked-node', 'extra-node') + FIELDS + ('missing-link', 'extra-link', 'rejected-link')
+
+# Options of clab_to_drawio for the first direction, chosen to keep as much of the topology as the diagram can hold
+DIAGRAM_OPTIONS = {'include_unlinked_nodes': True, 'groups': 'expanded'}
+
+def generate_topology(node_count, seed=0):
+    """
+    Generates a random containerlab topology with node_count nodes: a random tree with extra links, some node pairs
+    connected by several links, a few unlinked nodes, and random kinds, types, groups, management addresses and labels.
+    Endpoints are written in both the short "node:interface" and the extended format.
+    """
+    rng = random.Random(seed)
+    names = [f"{rng.choice(['spine', 'leaf', 'border', 'client', 'router'])}{i}" for i in range(1, node_count + 1)]
+
+    nodes = {}
+    for i, name in enumerate(names):
+        kind, node_type = rng.choice(KINDS)
+        node = {'kind': kind}
+        if node_type:
+            node['type'] = node_type
+        if rng.random() < 0.5:
+            node['group'] = f"pod{rng.randrange(max(1, node_count // 100))}"
+        if rng.random() < 0.8:
+            node['mgmt-ipv4'] = f"10.{i // 65536}.{i // 256 % 256}.{i % 256}"
+        if rng.random() < 0.3:
+            node['labels'] = {'role': rng.choice(['core', 'edge', 'access']), 'rack': f"r{rng.randrange(50)}"}
+        nodes[name] = node
+
+    # Every node but the unlinked ones is attached to a random earlier node, then extra and parallel links are added
+    linked = [name for name in names if rng.random() >= 0.05]
+    pairs = [(linked[i], linked[rng.randrange(i)]) for i in range(1, len(linked))]
+    pairs += [tuple(rng.sample(linked, 2)) for _ in range(len(linked) // 5)] if len(linked) > 1 else []
+    pairs += [rng.choice(pairs) for _ in range(len(pairs) // 10)] if pairs else []
+
+    interface_counts = Counter()
+    links = []
+    for source, target in pairs:
+        interface_counts[source] += 1
+        interface_counts[target] += 1
+        source_intf, target_intf = f"e1-{interface_counts[source]}", f"e1-{interface_counts[target]}"
+        if rng.random() < 0.5:
+            links.append({'endpoints': [f"{source}:{source_intf}", f"{target}:{target_intf}"]})
+        else:
+            links.append({'endpoints': [{'node': source, 'interface': source_intf}, {'node': target, 'interface': target_intf}]})
+
+    return {'name': f"random{node_count}", 'topology': {'nodes': nodes, 'links': links}}
+
+def link_endpoints(topology):
+    """Returns the links of a topology as a Counter of sorted endpoint pairs, ignoring the endpoint format and order."""
+    links = Counter()
+    for link in topology['topology'].get('links') or []:
+        links[tuple(sorted(":".join(clab2drawio.parse_endpoint(endpoint)) for endpoint in link['endpoints']))] += 1
+    return links
+
+def compare_topologies(original, converted):
+    """
+    Compares a topology with the result of its round trip.
+    Lost nodes are reported as 'unlinked-node' if they had no links in the original topology, as 'missing-node' otherwise.
+    Returns a dictionary mapping each kind of mismatch (see MISMATCH_KINDS) to the list of its occurrences.
+    """
+    mismatches = defaultdict(list)
+    original_nodes, converted_nodes = original['topology']['nodes'], converted['topology']['nodes']
+    linked_nodes = {endpoint.split(':', 1)[0] for endpoints in link_endpoints(original) for endpoint in endpoints}
+    for name in sorted(original_nodes.keys() - converted_nodes.keys()):
+        mismatches['missing-node' if name in linked_nodes else 'unlinked-node'].append(name)
+    for name in sorted(converted_nodes.keys() - original_nodes.keys()):
+        mismatches['extra-node'].append(name)
+    for name in sorted(original_nodes.keys() & converted_nodes.keys()):
+        for field in FIELDS:
+            expected, found = original_nodes[name].get(field), converted_nodes[name].get(field)
+            if expected != found:
+                mismatches[field].append(f"{name}: expected {expected!r}, found {found!r}")
+
+    original_links, converted_links = link_endpoints(original), link_endpoints(converted)
+    for endpoints, count in sorted((original_links - converted_links).items()):
+        mismatches['missing-link'].extend([" <-> ".join(endpoints)] * count)
+    for endpoints, count in sorted((converted_links - original_links).items()):
+        mismatches['extra-link'].extend([" <-> ".join(endpoints)] * count)
+    return mismatches
+
+def round_trip(topology):
+    """
+    Converts a topology to a diagram and back, in process.
+    Returns the converted topology, the diagram, the time of each direction in seconds and the links drawio2clab rejected.
+    """
+    start = time.perf_counter()
+    xml_data = clab2drawio.clab_to_drawio(topology, DIAGRAM_OPTIONS)
+    to_drawio = time.perf_counter() - start
+
+    errors = []
+    start = time.perf_counter()
+    converted = drawio2clab.drawio_to_clab(xml_data.encode(), {'name': topology['name'], 'errors': errors})
+    to_clab = time.perf_counter() - start
+    return converted, xml_data, to_drawio, to_clab, errors
+
+def main(sizes, seed=0, examples=3, ignore=()):
+    """
+    Runs the round trip on random topologies of the given sizes, prints the throughput of each direction and the mismatches.
+    Mismatches of the kinds in ignore are known losses: they are still listed, but do not make the run fail.
+    Returns the exit status: 0 if every topology survives the round trip unchanged apart from the ignored kinds, 1 otherwise.
+    """
+    print(f"{'nodes':>7} {'links':>7} {'yaml -> drawio':>22} {'drawio -> yaml':>22} {'mismatches':>11}")
+    totals = defaultdict(list)
+    for node_count in sizes:
+        topology = generate_topology(node_count, seed)
+        converted, xml_data, to_drawio, to_clab, errors = round_trip(topology)
+        mismatches = compare_topologies(topology, converted)
+        if errors:
+            mismatches['rejected-link'].extend(errors)
+
+        link_count = len(topology['topology']['links'])
+        print(f"{node_count:>7} {link_count:>7} {to_drawio:>7.2f}s {node_count / to_drawio:>7.0f} nodes/s {to_clab:>7.2f}s {node_count / to_clab:>7.0f} nodes/s {sum(map(len, mismatches.values())):>11}"
+              f"   ({len(xml_data) / 1e6:.1f} MB diagram)")
+        for kind, occurrences in mismatches.items():
+            totals[kind].extend(f"{topology['name']}: {occurrence}" for occurrence in occurrences)
+
+    if not totals:
+        print("All topologies survived the round trip unchanged")
+        return 0
+    print()
+    for kind, occurrences in sorted(totals.items()):
+        print(f"{kind}: {len(occurrences)}" + (" (ignored)" if kind in ignore else ""))
+        for occurrence in occurrences[:examples]:
+            print(f"    {occurrence}")
+    if all(kind in ignore for kind in totals):
+        print("\nOnly ignored mismatches were found")
+        return 0
+    return 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert random containerlab topologies to draw.io and back with clab2drawio and drawio2clab, and report what the round trip changes and how fast each direction is.")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[100, 1000, 5000], help="Number of nodes of the generated topologies. Default is 100 1000 5000.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated topologies. Default is 0.")
+    parser.add_argument("--examples", type=int, default=3, help="Number of examples printed for each kind of mismatch. Default is 3.")
+    parser.add_argument("--ignore", default="", help=f"Comma-separated kinds of mismatch that are known losses and do not fail the run, among: {', '.join(MISMATCH_KINDS)}.")
+
+    args = parser.parse_args()
+    ignore = [kind.strip() for kind in args.ignore.split(',') if kind.strip()]
+    unknown = set(ignore) - set(MISMATCH_KINDS)
+    if unknown:
+        parser.error(f"unknown mismatch kind(s) {', '.join(sorted(unknown))}, expected any of {', '.join(MISMATCH_KINDS)}")
+    sys.exit(main(args.sizes, args.seed, args.examples, ignore))
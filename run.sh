@@ -17,6 +17,39 @@ function test-on-release {
   gh act release -W '.github/workflows/cicd.yml' -e .github/workflows/release-event.json -s GITHUB_TOKEN="$(gh auth token)" --matrix platform:linux/amd64
 }
 
+# checks that both converters produce byte-identical files across runs and Python hash seeds
+function test-determinism {
+  local tmp
+  tmp="$(mktemp -d)"
+  trap 'rm -rf "${tmp}"' RETURN
+  for lab in lab-examples/*/*.clab.yml; do
+    name="$(basename "${lab}" .clab.yml)"
+    for layout in vertical horizontal force; do
+      for seed in 1 2; do
+        PYTHONHASHSEED=${seed} python clab2drawio.py -i "${lab}" -o "${tmp}/${name}-${layout}-${seed}.drawio" --layout "${layout}" > /dev/null
+        PYTHONHASHSEED=${seed} python drawio2clab.py -i "${tmp}/${name}-${layout}-1.drawio" -o "${tmp}/${name}-${layout}-${seed}.yaml" > /dev/null
+      done
+      cmp "${tmp}/${name}-${layout}-1.drawio" "${tmp}/${name}-${layout}-2.drawio"
+      cmp "${tmp}/${name}-${layout}-1.yaml" "${tmp}/${name}-${layout}-2.yaml"
+    done
+  done
+  echo "All outputs are deterministic"
+}
+
+# checks that no stage of the converters grows faster than its declared complexity bound
+# on generated topologies of 100 to 10,000 nodes; extra args are passed to complexity.py
+function test-complexity {
+  python complexity.py "$@"
+}
+
+# converts random topologies of 100 to 5,000 nodes to draw.io and back in process and reports
+# what the round trip loses and the throughput of each direction; extra args are passed to roundtrip.py.
+# The diagrams do not carry the kind, type, mgmt-ipv4 and labels of the nodes, and drawio2clab drops
+# unlinked nodes: these known losses are ignored, so the task only fails on new mismatches.
+function test-roundtrip {
+  python roundtrip.py --ignore kind,type,mgmt-ipv4,labels,unlinked-node "$@"
+}
+
 # -----------------------------------------------------------------------------
 # Bash runner functions.
 # -----------------------------------------------------------------------------
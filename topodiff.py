@@ -0,0 +1,169 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from collections import defaultdict
+import yaml
+import clab2drawio
+import drawio2clab
+
+# Node attributes that take part in the comparison, as written in containerlab and drawio2clab node data
+NODE_ATTRIBUTES = ('kind', 'type', 'image', 'mgmt-ipv4', 'group', 'labels')
+
+def digest(value):
+    """Returns a short, stable hash of a JSON-serialisable value."""
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=8).hexdigest()
+
+def canonical_link(source, source_intf, target, target_intf):
+    """Returns a link as a (endpoint, endpoint) tuple with the endpoints in sorted order."""
+    return tuple(sorted((f"{source}:{source_intf}", f"{target}:{target_intf}")))
+
+def is_diagram(input_file):
+    """Returns True if the file is a draw.io diagram rather than a containerlab topology."""
+    return os.path.splitext(input_file)[1].lower() in ('.drawio', '.xml')
+
+def load_topology(input_file, diagram_name=None):
+    """
+    Loads a containerlab YAML or a .drawio file into canonical form.
+    Links are read with the link extraction of the converters (clab2drawio for containerlab files, drawio2clab
+    for diagrams). Node attributes are taken as written in the file; for containerlab files, the kind, image and
+    type a node inherits from topology.kinds and topology.defaults are resolved first.
+    Links that drawio2clab cannot convert are reported on stderr. Raises ValueError if the diagram cannot be found.
+    Returns a dictionary of node name to attribute hash, a set of canonical links, and a hash of the
+    topology-wide settings (topology.defaults and topology.kinds, None for diagrams).
+    """
+    if is_diagram(input_file):
+        diagram_errors = []
+        root = drawio2clab.parse_xml(input_file, diagram_name, diagram_errors)
+        if root is None:
+            raise ValueError(f"{input_file}: {diagram_errors[-1]}")
+        node_details = drawio2clab.extract_nodes(root)
+        links_info = drawio2clab.extract_links(root, node_details)
+        drawio2clab.extract_link_labels(root, links_info)
+        nodes = {details.label: {attr: details.get(attr) for attr in NODE_ATTRIBUTES} for details in node_details.values()}
+        errors = []
+        links = set()
+        for link in drawio2clab.compile_link_information(links_info, errors=errors):
+            (source, source_intf), (target, target_intf) = (endpoint.split(':', 1) for endpoint in link['endpoints'])
+            links.add(canonical_link(source, source_intf, target, target_intf))
+        for error in errors:
+            print(f"{input_file}: {error}", file=sys.stderr)
+        settings = None
+    else:
+        containerlab_data = clab2drawio.load_topology_file(input_file)
+        nodes = {name: {attr: info.get(attr) for attr in NODE_ATTRIBUTES} for name, info in clab2drawio.resolve_nodes(containerlab_data).items()}
+        links = {canonical_link(link['source'], link['source_intf'], link['target'], link['target_intf']) for link in clab2drawio.extract_links(containerlab_data)}
+        topology = containerlab_data['topology']
+        settings = digest({'defaults': topology.get('defaults'), 'kinds': topology.get('kinds')})
+
+    return {name: digest(attributes) for name, attributes in nodes.items()}, links, settings
+
+def topology_digest(nodes, links, structure_only=False, settings=None):
+    """
+    Returns a hash of the whole canonical topology, independent of node and link order, including the
+    topology-wide settings unless structure_only.
+    It only changes when the topology does, so it can be used as a cache key for generated files.
+    """
+    if structure_only:
+        return digest([sorted(nodes), sorted(links)])
+    return digest([sorted(nodes.items()), sorted(links), settings])
+
+def diff_topologies(old_nodes, old_links, new_nodes, new_links, structure_only=False):
+    """
+    Compares two canonical topologies in linear time.
+    Nodes are matched by name and reported as changed when their attributes differ (unless structure_only).
+    Links are matched by their endpoints; when a pair of nodes keeps its number of links but some of them
+    moved to other interfaces, those links are reported as changed rather than removed and added.
+    Returns a dictionary with the added, removed and changed nodes and links.
+    """
+    added_nodes = sorted(name for name in new_nodes if name not in old_nodes)
+    removed_nodes = sorted(name for name in old_nodes if name not in new_nodes)
+    changed_nodes = [] if structure_only else sorted(name for name, node_hash in new_nodes.items() if name in old_nodes and old_nodes[name] != node_hash)
+
+    # Group the links that only exist on one side by the pair of nodes they connect
+    removed_by_pair, added_by_pair = defaultdict(list), defaultdict(list)
+    for link in old_links - new_links:
+        removed_by_pair[tuple(sorted(endpoint.split(':', 1)[0] for endpoint in link))].append(link)
+    for link in new_links - old_links:
+        added_by_pair[tuple(sorted(endpoint.split(':', 1)[0] for endpoint in link))].append(link)
+
+    added_links, removed_links, changed_links = [], [], []
+    for pair in removed_by_pair.keys() | added_by_pair.keys():
+        removed, added = sorted(removed_by_pair.get(pair, [])), sorted(added_by_pair.get(pair, []))
+        rewired = min(len(removed), len(added))
+        changed_links.extend(zip(removed[:rewired], added[:rewired]))
+        removed_links.extend(removed[rewired:])
+        added_links.extend(added[rewired:])
+
+    return {
+        'nodes': {'added': added_nodes, 'removed': removed_nodes, 'changed': changed_nodes},
+        'links': {'added': sorted(added_links), 'removed': sorted(removed_links), 'changed': sorted(changed_links)},
+    }
+
+def has_changes(differences):
+    """Returns True if the result of diff_topologies contains any difference."""
+    return any(items for section in differences.values() for items in section.values())
+
+def format_link(link):
+    return f"{link[0]} -- {link[1]}"
+
+def print_differences(differences):
+    """Prints the result of diff_topologies in a diff-like format."""
+    nodes, links = differences['nodes'], differences['links']
+    print(f"Nodes: {len(nodes['added'])} added, {len(nodes['removed'])} removed, {len(nodes['changed'])} changed")
+    for name in nodes['added']:
+        print(f"+ {name}")
+    for name in nodes['removed']:
+        print(f"- {name}")
+    for name in nodes['changed']:
+        print(f"~ {name}")
+    print(f"Links: {len(links['added'])} added, {len(links['removed'])} removed, {len(links['changed'])} changed")
+    for link in links['added']:
+        print(f"+ {format_link(link)}")
+    for link in links['removed']:
+        print(f"- {format_link(link)}")
+    for old_link, new_link in links['changed']:
+        print(f"~ {format_link(old_link)} => {format_link(new_link)}")
+
+def main(old_file, new_file=None, diagram_name=None, structure_only=False, output_format='text', quiet=False):
+    """
+    Compares two topologies, each given as a containerlab YAML or a .drawio file, or prints the digest of one.
+    A containerlab file and a diagram do not carry the same node attributes, so they are always compared structure only.
+    Returns the exit status: 0 if the topologies are identical, 1 if they differ, 2 if a file cannot be read,
+    in which case the error is printed on stderr.
+    """
+    try:
+        old_nodes, old_links, old_settings = load_topology(old_file, diagram_name)
+        if new_file is not None:
+            new_nodes, new_links, _ = load_topology(new_file, diagram_name)
+    except (OSError, ValueError, drawio2clab.ParseError, yaml.YAMLError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 2
+
+    if new_file is None:
+        print(topology_digest(old_nodes, old_links, structure_only, old_settings))
+        return 0
+
+    structure_only = structure_only or is_diagram(old_file) != is_diagram(new_file)
+    differences = diff_topologies(old_nodes, old_links, new_nodes, new_links, structure_only)
+    if not quiet:
+        if output_format == 'json':
+            print(json.dumps(differences, indent=2))
+        else:
+            print_differences(differences)
+    return 1 if has_changes(differences) else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two topologies (containerlab YAML or draw.io files) by their nodes and links. Exits with 0 if they are identical, 1 if they differ and 2 if a file cannot be read.")
+    parser.add_argument("old_file", help="The original topology file.")
+    parser.add_argument("new_file", nargs='?', help="The changed topology file. If omitted, the digest of the original topology is printed.")
+    parser.add_argument("--diagram-name", dest="diagram_name", required=False, help="The name of the diagram (tab) to be parsed in .drawio files.")
+    parser.add_argument("--structure-only", action='store_true', help="Only compare node names and links, ignoring node attributes such as kind and image.")
+    parser.add_argument("--format", dest="output_format", choices=['text', 'json'], default='text', help="Output format of the differences. Default is 'text'.")
+    parser.add_argument("-q", "--quiet", action='store_true', help="Do not print the differences, only set the exit status.")
+
+    args = parser.parse_args()
+
+    sys.exit(main(args.old_file, args.new_file, args.diagram_name, args.structure_only, args.output_format, args.quiet))
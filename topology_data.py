@@ -0,0 +1,157 @@
+import json
+import re
+
+# Labels containerlab adds to every node at deploy time; they describe the deployment, not the topology
+RUNTIME_LABEL_PREFIXES = ('clab-', 'containerlab')
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class JsonStream:
+    """
+    Reads a JSON document from a file incrementally. Containers can be walked member by member with
+    members() and elements(), and any value can be decoded as a whole with value(), so only the value
+    being decoded has to be in memory rather than the whole document.
+    """
+
+    def __init__(self, file, chunk_size=1 << 16):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        """Reads more of the file, at least as much as is buffered, so decoding a large value stays linear."""
+        chunk = self.file.read(max(self.chunk_size, len(self.buffer) - self.position))
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it, or '' at the end of the file."""
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer) or self.eof:
+                return self.buffer[self.position:self.position + 1]
+            self.fill()
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid JSON: expected '{char}' but found '{found or 'end of file'}'")
+        self.position += 1
+
+    def value(self):
+        """Decodes and returns the next value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as error:
+                if self.eof:
+                    raise ValueError(f"Invalid JSON: {error.msg}")
+                self.fill()
+                continue
+            # A number or literal at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof:
+                self.fill()
+                continue
+            self.position = end
+            return value
+
+    def members(self):
+        """
+        Yields the keys of the next object. After each key, the caller must consume its value,
+        with value(), members() or elements().
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.position += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.position += 1
+                continue
+            self.expect('}')
+            return
+
+    def elements(self):
+        """
+        Yields the index of every element of the next array. After each index, the caller must consume
+        the element, with value(), members() or elements().
+        """
+        self.expect('[')
+        if self.peek() == ']':
+            self.position += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            if self.peek() == ',':
+                self.position += 1
+                continue
+            self.expect(']')
+            return
+
+def convert_node(info):
+    """
+    Converts a node of topology-data.json to a containerlab topology node, keeping the kind, image, type,
+    group, management addresses and user labels.
+    """
+    labels = info.get('labels') or {}
+    node = {
+        'kind': info.get('kind'),
+        'image': info.get('image'),
+        'type': labels.get('clab-node-type'),
+        'group': info.get('group'),
+        'mgmt-ipv4': info.get('mgmt-ipv4-address'),
+        'mgmt-ipv6': info.get('mgmt-ipv6-address'),
+        'labels': {key: value for key, value in labels.items() if not key.startswith(RUNTIME_LABEL_PREFIXES)},
+    }
+    return {key: value for key, value in node.items() if value}
+
+def convert_link(link):
+    """
+    Converts a link of topology-data.json, with its 'a' and 'z' sides, to a containerlab link
+    in the extended format, with the node and interface of each endpoint already resolved.
+    """
+    return {'endpoints': [{'node': link[side]['node'], 'interface': link[side]['interface']} for side in ('a', 'z')]}
+
+def read_topology_data(file, chunk_size=1 << 16):
+    """
+    Reads a topology-data.json file, as written by containerlab when a lab is deployed, from an open text file.
+    Nodes and links are decoded one at a time, so the whole document is never held in memory.
+    Returns the topology in the same form as a parsed .clab.yml.
+    """
+    stream = JsonStream(file, chunk_size)
+    name, nodes, links = None, {}, []
+    for key in stream.members():
+        if key == 'name':
+            name = stream.value()
+        elif key == 'nodes':
+            for node_name in stream.members():
+                nodes[node_name] = convert_node(stream.value())
+        elif key == 'links':
+            for _ in stream.elements():
+                link = stream.value()
+                if 'a' in link and 'z' in link:
+                    links.append(convert_link(link))
+        else:
+            # Runtime details such as the management network and SSH keys are not needed
+            stream.value()
+
+    if stream.peek():
+        raise ValueError("Invalid JSON: unexpected data after the topology")
+    return {'name': name, 'topology': {'nodes': nodes, 'links': links}}
+
+def load_topology_data(file_path):
+    """Reads a topology-data.json file, see read_topology_data."""
+    with open(file_path, 'r') as file:
+        return read_topology_data(file)